@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Benchmark the Jurassica asset pipelines on synthetic inputs.
+
+Generates synthetic raw building art (green screen, magenta screen, white
+background and already-transparent variants, at several sizes) in a temporary
+content tree, then times:
+  - every stage of process_building_art.process_building
+  - a full process_building_art.batch_process run
+  - generate_placeholders.generate_all
+  - generate_animation_jsons.generate_all (from the tables and from disk)
+
+Results are written as JSON so two runs can be compared with a regression
+threshold.
+
+Usage:
+  python benchmark_pipelines.py
+  python benchmark_pipelines.py --output bench/after.json --repeat 5
+  python benchmark_pipelines.py --baseline bench/before.json
+  python benchmark_pipelines.py --compare bench/before.json bench/after.json --threshold 0.15
+
+Requirements: pip install Pillow numpy
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+import PIL
+from PIL import Image, ImageDraw
+
+import generate_animation_jsons
+import generate_placeholders
+import process_building_art
+
+# Background variants: (name, background RGBA). Together they exercise every
+# branch of remove_background: each chroma key, the corner-sampled fallback
+# and the already-transparent early exit.
+VARIANTS = [
+    ("green", (0, 200, 0, 255)),
+    ("magenta", (255, 0, 255, 255)),
+    ("white", (250, 250, 248, 255)),
+    ("transparent", (0, 0, 0, 0)),
+]
+
+# Building used for per-stage timings and the raw sizes it is rendered at,
+# as multiples of its target size (show_prompt recommends 4x)
+STAGE_BUILDING = "castle"
+RAW_SCALES = [1, 2, 4]
+
+# Buildings for the full batch run, one per size category
+BATCH_BUILDINGS = ["castle", "citadel", "dwelling7", "dwelling1", "tavern", "special4",
+                   "fort", "mageGuild1"]
+BATCH_SCALE = 4
+
+DEFAULT_OUTPUT = "bench_results.json"
+DEFAULT_THRESHOLD = 0.10
+
+
+def make_raw_building(size, background, seed=0):
+    """Draw a synthetic building on the given background, bottom-anchored."""
+    w, h = size
+    rnd = random.Random(seed)
+    img = Image.new("RGBA", (w, h), background)
+    draw = ImageDraw.Draw(img)
+
+    # Walls, roof and a handful of windows/details, kept off the corners
+    left, right = w // 6, w - w // 6
+    top, bottom = h // 3, h - h // 12
+    draw.rectangle([left, top, right, bottom], fill=(120, 90, 60, 255))
+    draw.polygon([(left - w // 20, top), (w // 2, h // 10), (right + w // 20, top)],
+                 fill=(90, 50, 40, 255))
+    for _ in range(24):
+        x = rnd.randrange(left, right - w // 12)
+        y = rnd.randrange(top, bottom - h // 12)
+        color = (rnd.randrange(40, 220), rnd.randrange(20, 160), rnd.randrange(20, 200), 255)
+        draw.ellipse([x, y, x + w // 12, y + h // 12], fill=color)
+    return img
+
+
+def _patch_content_root(root):
+    """Point all three scripts at a temporary copy of the content tree."""
+    content = os.path.join(root, "Mods", "jurassica", "Content")
+
+    process_building_art.CONTENT = content
+    process_building_art.BUILDINGS_DIR = os.path.join(
+        content, "sprites", "towns", "jurassica", "buildings")
+    process_building_art.BUILDINGS_2X_DIR = os.path.join(
+        content, "Sprites2x", "towns", "jurassica", "buildings")
+    process_building_art.TOWN_BG_PATH = os.path.join(
+        content, "sprites", "towns", "jurassica", "townBackground.png")
+    process_building_art.CONFIG_PATH = os.path.join(content, "config", "jurassica.json")
+    process_building_art.PREVIEWS_DIR = os.path.join(root, "previews")
+    process_building_art.CACHE_PATH = os.path.join(root, ".building_art_cache.json")
+    process_building_art.load_town_background.cache_clear()
+
+    generate_placeholders.CONTENT = content
+    generate_placeholders.MANIFEST_PATH = os.path.join(root, ".placeholder_manifest.json")
+
+    generate_animation_jsons.CONTENT = content
+    generate_animation_jsons.SPRITES = os.path.join(content, "sprites", "creatures")
+
+    # The pipelines need the real town background and faction config
+    for rel in [os.path.join("sprites", "towns", "jurassica", "townBackground.png"),
+                os.path.join("config", "jurassica.json")]:
+        src = os.path.join(generate_placeholders.BASE, "Mods", "jurassica", "Content", rel)
+        dst = os.path.join(content, rel)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if os.path.exists(src):
+            shutil.copyfile(src, dst)
+
+
+def _timed(fn, *args, **kwargs):
+    """Run fn quietly and return its wall time in seconds."""
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        fn(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def bench_stages(raw_dir, repeat):
+    """Per-stage timings of process_building for every variant and raw size."""
+    results = {}
+    os.makedirs(raw_dir, exist_ok=True)
+    target_w, target_h = process_building_art.BUILDING_SIZES[STAGE_BUILDING]
+    for variant, background in VARIANTS:
+        for scale in RAW_SCALES:
+            size = (target_w * scale, target_h * scale)
+            path = os.path.join(raw_dir, f"{variant}_{size[0]}x{size[1]}.png")
+            make_raw_building(size, background).save(path)
+
+            best = {}
+            for _ in range(repeat):
+                # Times only: memory sampling would add its own overhead to every stage
+                profiler = process_building_art.PipelineProfiler(memory=False)
+                total = _timed(process_building_art.process_building, STAGE_BUILDING, path,
+                               profiler=profiler)
+                for record in profiler.records:
+                    best[record["stage"]] = min(best.get(record["stage"], float("inf")),
+                                                record["seconds"])
+                best["total"] = min(best.get("total", float("inf")), total)
+
+            for stage, seconds in best.items():
+                results[f"process_building/{variant}/{size[0]}x{size[1]}/{stage}"] = seconds
+    return results
+
+
+def bench_batch(raw_dir, repeat):
+    """Full batch_process over one synthetic raw per BATCH_BUILDINGS entry."""
+    os.makedirs(raw_dir, exist_ok=True)
+    for i, key in enumerate(BATCH_BUILDINGS):
+        target_w, target_h = process_building_art.BUILDING_SIZES[key]
+        _, background = VARIANTS[i % len(VARIANTS)]
+        make_raw_building((target_w * BATCH_SCALE, target_h * BATCH_SCALE), background,
+                          seed=i).save(os.path.join(raw_dir, f"{key}.png"))
+
+    cold = min(_timed(process_building_art.batch_process, raw_dir, force=True)
+               for _ in range(repeat))
+    cached = min(_timed(process_building_art.batch_process, raw_dir)
+                 for _ in range(repeat))
+    return {"batch_process/cold": cold, "batch_process/cached": cached}
+
+
+def bench_generators(repeat):
+    """Full placeholder and animation JSON generation."""
+    return {
+        "generate_placeholders.generate_all":
+            min(_timed(generate_placeholders.generate_all, force=True) for _ in range(repeat)),
+        "generate_placeholders.generate_all/cached":
+            min(_timed(generate_placeholders.generate_all) for _ in range(repeat)),
+        "generate_animation_jsons.generate_all":
+            min(_timed(generate_animation_jsons.generate_all) for _ in range(repeat)),
+        "generate_animation_jsons.generate_all/from_disk":
+            min(_timed(generate_animation_jsons.generate_all, from_disk=True)
+                for _ in range(repeat)),
+    }
+
+
+def run_benchmarks(repeat):
+    """Run every benchmark in a temporary content tree and return the results."""
+    root = tempfile.mkdtemp(prefix="jurassica-bench-")
+    try:
+        _patch_content_root(root)
+        results = {}
+        results.update(bench_stages(os.path.join(root, "stage_raw"), repeat))
+        results.update(bench_batch(os.path.join(root, "raw"), repeat))
+        results.update(bench_generators(repeat))
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "pillow": PIL.__version__,
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline, current, threshold):
+    """Print a before/after table and return the names that regressed."""
+    regressions = []
+    print(f"\n  {'benchmark':<58} {'before':>9} {'after':>9} {'change':>8}")
+    for name in sorted(set(baseline["results"]) | set(current["results"])):
+        before = baseline["results"].get(name)
+        after = current["results"].get(name)
+        if before is None or after is None:
+            shown = "new" if before is None else "removed"
+            print(f"  {name:<58} {before or 0:9.4f} {after or 0:9.4f} {shown:>8}")
+            continue
+
+        change = (after - before) / before if before else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"  {name:<58} {before:9.4f} {after:9.4f} {change:+8.1%}{flag}")
+
+    print(f"\n{len(regressions)} regression(s) above {threshold:.0%}")
+    return regressions
+
+
+def print_results(data):
+    print(f"\n  {'benchmark':<58} {'seconds':>9}")
+    for name, seconds in sorted(data["results"].items()):
+        print(f"  {name:<58} {seconds:9.4f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the Jurassica asset pipelines on synthetic inputs",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                                       Run and write bench_results.json
+  %(prog)s --output after.json --repeat 5        Best of 5 runs per benchmark
+  %(prog)s --baseline before.json                Run, then compare with a baseline
+  %(prog)s --compare before.json after.json      Compare two stored runs
+        """,
+    )
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="Where to write results JSON")
+    parser.add_argument("--repeat", type=int, default=3,
+                        help="Runs per benchmark; the fastest is kept")
+    parser.add_argument("--baseline", metavar="JSON", help="Compare this run against JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"),
+                        help="Compare two stored result files without running")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Relative slowdown counted as a regression (default 0.10)")
+
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+        sys.exit(1 if compare(baseline, current, args.threshold) else 0)
+
+    print(f"Running pipeline benchmarks (best of {args.repeat})...")
+    data = run_benchmarks(max(1, args.repeat))
+    print_results(data)
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+    print(f"\nResults: {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        sys.exit(1 if compare(baseline, data, args.threshold) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,31 @@
 """
 Generate animation JSON descriptor files for all Jurassica creatures.
 These map VCMI animation groups to the PNG frame files.
+
+By default frame lists come from the ANIM_GROUPS/RANGED_GROUPS tables. With
+--from-disk they are compiled from the frames that actually exist: each
+sprite directory is scanned once, only PNG headers are read, and missing
+groups, gaps in frame numbering and inconsistent frame sizes are reported.
+
+Creature frames cropped by trim_creature_frames.py (into trimmed/) carry an
+"offset" (and the full "canvas" size) on each battle sequence, read from
+<name>Trim.json next to the frames, so the trimmed frames stay anchored
+where the full-canvas ones were.
+
+Usage:
+  python generate_animation_jsons.py
+  python generate_animation_jsons.py --from-disk
+  python generate_animation_jsons.py --from-disk --strict
 """
 
+import argparse
 import json
 import os
+import re
+import struct
+import sys
+
+import output_files
 
 BASE = os.path.dirname(os.path.abspath(__file__))
 CONTENT = os.path.join(BASE, "Mods", "jurassica", "Content")
@@ -61,16 +82,140 @@ RANGED_GROUPS = {
 }
 
 
-def generate_battle_animation(creature_name):
-    """Generate the battle animation JSON for a creature."""
+# Groups that show only the first frame of their label, whatever is on disk
+STILL_GROUPS = {7, 8}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+def png_size(path):
+    """(width, height) from a PNG's IHDR chunk, or None if it is not a PNG."""
+    with open(path, 'rb') as f:
+        header = f.read(24)
+    if len(header) < 24 or header[:8] != PNG_SIGNATURE or header[12:16] != b"IHDR":
+        return None
+    return struct.unpack(">II", header[16:24])
+
+
+class SpriteIndex:
+    """The PNG frames on disk, one os.scandir pass per sprite directory.
+
+    Directories are scanned lazily, keyed by their basepath relative to
+    Content/, and only PNG headers are read. Anything that does not add up
+    (missing groups, gaps, mixed frame sizes) is collected in `problems`.
+    """
+
+    def __init__(self, content_dir):
+        self.content_dir = content_dir
+        self.problems = []
+        self._dirs = {}
+        self._frames = {}
+
+    def files(self, basepath):
+        """Map filename -> (width, height) for every PNG under basepath."""
+        if basepath not in self._dirs:
+            found = {}
+            try:
+                with os.scandir(os.path.join(self.content_dir, basepath)) as entries:
+                    for entry in entries:
+                        if entry.is_file() and entry.name.endswith(".png"):
+                            found[entry.name] = png_size(entry.path)
+            except FileNotFoundError:
+                pass
+            self._dirs[basepath] = found
+        return self._dirs[basepath]
+
+    def has(self, basepath, filename):
+        return filename in self.files(basepath)
+
+    def frames(self, basepath, prefix, suffix=".png"):
+        """Existing `<prefix><N><suffix>` frames under basepath, ordered by N.
+
+        Gaps in the numbering are reported (once); the frames present are
+        still used.
+        """
+        key = (basepath, prefix, suffix)
+        if key in self._frames:
+            return self._frames[key]
+        pattern = re.compile(re.escape(prefix) + r"(\d+)" + re.escape(suffix) + "$")
+        numbered = sorted((int(m.group(1)), name) for name in self.files(basepath)
+                          if (m := pattern.match(name)))
+        if numbered and [n for n, _ in numbered] != list(range(len(numbered))):
+            self.problems.append(f"{basepath}{prefix}N{suffix}: frame numbers "
+                                 f"{[n for n, _ in numbered]} have gaps")
+        self._frames[key] = [name for _, name in numbered]
+        return self._frames[key]
+
+    def check_sizes(self, basepath, filenames, what):
+        """Report if the given frames do not all share one size."""
+        files = self.files(basepath)
+        sizes = {}
+        for name in filenames:
+            sizes.setdefault(files[name], []).append(name)
+        if len(sizes) > 1:
+            summary = ", ".join(f"{'x'.join(map(str, size)) if size else 'unreadable'} "
+                                f"in {len(names)} frame(s), e.g. {names[0]}"
+                                for size, names in sorted(sizes.items(), key=lambda i: -len(i[1])))
+            self.problems.append(f"{what}: inconsistent frame sizes: {summary}")
+
+
+def trim_path(content_dir, creature_name):
+    return os.path.join(content_dir, "sprites", "creatures", creature_name,
+                        f"{creature_name}Trim.json")
+
+
+def load_trim(content_dir, creature_name):
+    """Map frame label -> trim record written by trim_creature_frames.py.
+
+    Each record has "canvas" (the full frame size), "offset" (top-left of
+    the crop in that canvas) and "size" (the cropped frame size). Returns
+    {} for untrimmed creatures.
+    """
+    try:
+        with open(trim_path(content_dir, creature_name), 'r') as f:
+            return json.load(f).get("labels", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _static_frames(index, basepath, filename, what):
+    """[filename], or [] (reported) if a SpriteIndex says it is not on disk."""
+    if index is None or index.has(basepath, filename):
+        return [filename]
+    index.problems.append(f"{what}: {basepath}{filename} not found")
+    return []
+
+
+def generate_battle_animation(creature_name, index=None):
+    """Generate the battle animation JSON for a creature.
+
+    With a SpriteIndex, every group lists the frames that exist on disk
+    instead of the table's frame count. Groups whose frames were trimmed get
+    the trim offset and canvas size; with a SpriteIndex, trim records that no
+    longer match the frames on disk are reported and left out.
+    """
     groups = dict(ANIM_GROUPS)
     if creature_name in RANGED:
         groups.update(RANGED_GROUPS)
+    basepath = f"sprites/creatures/{creature_name}/"
+    trim = load_trim(index.content_dir if index is not None else CONTENT, creature_name)
 
     sequences = []
+    used = set()
+    stale = set()
     for group_id in sorted(groups.keys()):
         label, num_frames = groups[group_id]
-        frames = [f"{label}_{i:02d}.png" for i in range(num_frames)]
+        if index is None:
+            frames = [f"{label}_{i:02d}.png" for i in range(num_frames)]
+        else:
+            frames = index.frames(basepath, f"{label}_")
+            if not frames:
+                index.problems.append(f"{creature_name}: no {label}_NN.png frames "
+                                      f"for group {group_id}")
+                continue
+            if group_id in STILL_GROUPS:
+                frames = frames[:1]
+            used.update(frames)
         seq = {
             "group": group_id,
             "frames": frames
@@ -78,52 +223,90 @@ def generate_battle_animation(creature_name):
         if group_id in (0, 1, 11, 12, 13):
             seq["generateShadow"] = 1
             seq["generateOverlay"] = 1
+        entry = trim.get(label)
+        if entry and index is not None:
+            files = index.files(basepath)
+            if any(files[name] != tuple(entry["size"]) for name in frames):
+                if label not in stale:
+                    stale.add(label)
+                    index.problems.append(f"{creature_name}: {label}_NN.png frames changed "
+                                          f"since they were trimmed, offset dropped")
+                entry = None
+        if entry:
+            seq["offset"] = entry["offset"]
+            seq["canvas"] = entry["canvas"]
         sequences.append(seq)
 
+    if index is not None:
+        if trim:
+            # Trimmed labels differ in size; each must still be consistent
+            for label in sorted({label for label, _ in groups.values()}):
+                index.check_sizes(basepath, [name for name in sorted(used)
+                                             if name.startswith(f"{label}_")],
+                                  f"{creature_name} {label}")
+        else:
+            index.check_sizes(basepath, sorted(used), f"{creature_name} battle")
+
     return {
-        "basepath": f"sprites/creatures/{creature_name}/",
+        "basepath": basepath,
         "sequences": sequences
     }
 
 
-def generate_map_animation(creature_name):
+def generate_map_animation(creature_name, index=None):
     """Generate the adventure map animation JSON for a creature."""
+    basepath = f"sprites/creatures/{creature_name}/"
+    if index is None:
+        frames = ["map_00.png"]
+    else:
+        frames = index.frames(basepath, "map_")
+        if not frames:
+            index.problems.append(f"{creature_name}: no map_NN.png frames")
     return {
-        "basepath": f"sprites/creatures/{creature_name}/",
+        "basepath": basepath,
         "sequences": [
             {
                 "group": 0,
-                "frames": ["map_00.png"]
+                "frames": frames
             }
-        ]
+        ] if frames else []
     }
 
 
-def generate_missile_animation(creature_name):
+def generate_missile_animation(creature_name, index=None):
     """Generate the missile animation JSON for ranged creatures."""
+    basepath = f"sprites/creatures/{creature_name}/"
+    if index is None:
+        frames = [f"missile_{angle_idx:02d}.png" for angle_idx in range(13)]
+    else:
+        frames = index.frames(basepath, "missile_")
+        if not frames:
+            index.problems.append(f"{creature_name}: no missile_NN.png frames")
     sequences = []
-    for angle_idx in range(13):
+    for angle_idx, frame in enumerate(frames):
         sequences.append({
             "group": angle_idx,
-            "frames": [f"missile_{angle_idx:02d}.png"]
+            "frames": [frame]
         })
 
     return {
-        "basepath": f"sprites/creatures/{creature_name}/",
+        "basepath": basepath,
         "sequences": sequences
     }
 
 
-def generate_adventure_town_animation(variant):
+def generate_adventure_town_animation(variant, index=None):
     """Generate adventure map town sprite animation JSON."""
+    frames = _static_frames(index, "sprites/adventure/", f"jurassica{variant}.png",
+                            f"adventure map {variant}")
     return {
         "basepath": "sprites/adventure/",
         "sequences": [
             {
                 "group": 0,
-                "frames": [f"jurassica{variant}.png"]
+                "frames": frames
             }
-        ]
+        ] if frames else []
     }
 
 
@@ -145,44 +328,87 @@ BUILDING_IDS = {
 BUILDINGS = list(BUILDING_IDS.keys())
 
 
-def generate_building_animation(building_key):
+def generate_building_animation(building_key, index=None):
     """Generate a building animation JSON (single-frame static)."""
+    basepath = "sprites/towns/jurassica/buildings/"
+    frames = _static_frames(index, basepath, f"{building_key}.png", building_key)
     return {
-        "basepath": "sprites/towns/jurassica/buildings/",
+        "basepath": basepath,
         "sequences": [
             {
                 "group": 0,
-                "frames": [f"{building_key}.png"]
+                "frames": frames
             }
-        ]
+        ] if frames else []
     }
 
 
-def main():
-    print("Generating animation JSON descriptors...")
+def generate_hero_map_animation(hero_type, index=None):
+    """Generate a hero class's adventure map animation JSON.
+
+    Groups 0-7 are the 8 compass directions, 4 walking frames each.
+    """
+    map_sequences = []
+    for direction in range(8):
+        if index is None:
+            frames = [f"{hero_type}Map_dir{direction}_f{fi}.png" for fi in range(4)]
+        else:
+            frames = index.frames("sprites/heroes/", f"{hero_type}Map_dir{direction}_f")
+            if not frames:
+                index.problems.append(f"{hero_type}: no map frames for direction {direction}")
+                continue
+        map_sequences.append({
+            "group": direction,
+            "frames": frames
+        })
+    if index is not None:
+        index.check_sizes("sprites/heroes/",
+                          [frame for seq in map_sequences for frame in seq["frames"]],
+                          f"{hero_type} map")
+    return {
+        "basepath": "sprites/heroes/",
+        "sequences": map_sequences
+    }
+
+
+def write_animation(path, anim, index=None):
+    """Write an animation JSON if its contents changed; with a SpriteIndex,
+    skip (and report) empty ones."""
+    if index is not None and not anim["sequences"]:
+        index.problems.append(f"{os.path.basename(path)}: no frames on disk, not written")
+        return
+    output_files.write_json(path, anim, indent='\t')
+
+
+def generate_all(from_disk=False):
+    """Write every animation JSON.
+
+    With from_disk, frame lists are compiled from a SpriteIndex of the
+    sprite directories; returns the problems it found (empty otherwise).
+    """
+    index = SpriteIndex(CONTENT) if from_disk else None
+    output_files.reset_stats()
+
+    print("Generating animation JSON descriptors..."
+          + (" (from disk)" if index is not None else ""))
 
     for name in CREATURES:
         creature_dir = os.path.join(SPRITES, name)
         os.makedirs(creature_dir, exist_ok=True)
 
         # Battle animation
-        battle_anim = generate_battle_animation(name)
-        battle_path = os.path.join(creature_dir, f"{name}.json")
-        with open(battle_path, 'w') as f:
-            json.dump(battle_anim, f, indent='\t')
+        battle_anim = generate_battle_animation(name, index)
+        write_animation(os.path.join(creature_dir, f"{name}.json"), battle_anim, index)
 
         # Map animation
-        map_anim = generate_map_animation(name)
-        map_path = os.path.join(creature_dir, f"{name}Map.json")
-        with open(map_path, 'w') as f:
-            json.dump(map_anim, f, indent='\t')
+        map_anim = generate_map_animation(name, index)
+        write_animation(os.path.join(creature_dir, f"{name}Map.json"), map_anim, index)
 
         # Missile animation (ranged only)
         if name in RANGED:
-            missile_anim = generate_missile_animation(name)
-            missile_path = os.path.join(creature_dir, f"{name}Missile.json")
-            with open(missile_path, 'w') as f:
-                json.dump(missile_anim, f, indent='\t')
+            missile_anim = generate_missile_animation(name, index)
+            write_animation(os.path.join(creature_dir, f"{name}Missile.json"),
+                            missile_anim, index)
 
         print(f"  {name}: battle + map" + (" + missile" if name in RANGED else ""))
 
@@ -191,10 +417,8 @@ def main():
     os.makedirs(adventure_dir, exist_ok=True)
 
     for variant in ["Village", "Fort", "Castle"]:
-        anim = generate_adventure_town_animation(variant)
-        anim_path = os.path.join(adventure_dir, f"jurassica{variant}.json")
-        with open(anim_path, 'w') as f:
-            json.dump(anim, f, indent='\t')
+        anim = generate_adventure_town_animation(variant, index)
+        write_animation(os.path.join(adventure_dir, f"jurassica{variant}.json"), anim, index)
         print(f"  Adventure map: jurassica{variant}")
 
     # Hero animations (placeholder - single frame)
@@ -203,34 +427,22 @@ def main():
 
     for hero_type in ["sauromancer", "warchief"]:
         # Battle animation (single-frame placeholder using portrait)
+        frames = _static_frames(index, "sprites/heroes/", "primalusSmall.png",
+                                f"{hero_type} battle")
         battle_anim = {
             "basepath": "sprites/heroes/",
             "sequences": [
                 {
                     "group": 0,
-                    "frames": ["primalusSmall.png"]
+                    "frames": frames
                 }
-            ]
+            ] if frames else []
         }
-        battle_path = os.path.join(heroes_dir, f"{hero_type}Battle.json")
-        with open(battle_path, 'w') as f:
-            json.dump(battle_anim, f, indent='\t')
+        write_animation(os.path.join(heroes_dir, f"{hero_type}Battle.json"), battle_anim, index)
 
         # Map animation — groups 0-7 for 8 compass directions, 4 walking frames each
-        map_sequences = []
-        for direction in range(8):
-            frames = [f"{hero_type}Map_dir{direction}_f{fi}.png" for fi in range(4)]
-            map_sequences.append({
-                "group": direction,
-                "frames": frames
-            })
-        map_anim = {
-            "basepath": "sprites/heroes/",
-            "sequences": map_sequences
-        }
-        map_path = os.path.join(heroes_dir, f"{hero_type}Map.json")
-        with open(map_path, 'w') as f:
-            json.dump(map_anim, f, indent='\t')
+        map_anim = generate_hero_map_animation(hero_type, index)
+        write_animation(os.path.join(heroes_dir, f"{hero_type}Map.json"), map_anim, index)
 
         print(f"  Hero animation: {hero_type} (battle + map with 8 directions)")
 
@@ -239,30 +451,61 @@ def main():
     os.makedirs(buildings_dir, exist_ok=True)
 
     for bkey in BUILDINGS:
-        banim = generate_building_animation(bkey)
-        bpath = os.path.join(buildings_dir, f"{bkey}.json")
-        with open(bpath, 'w') as f:
-            json.dump(banim, f, indent='\t')
+        banim = generate_building_animation(bkey, index)
+        write_animation(os.path.join(buildings_dir, f"{bkey}.json"), banim, index)
     print(f"  Buildings: {len(BUILDINGS)} animation JSONs")
 
     # Building hall icons animation JSON
     # Group numbers must match building IDs from jurassica.json
     icon_sequences = []
     for bkey in BUILDINGS:
+        frames = _static_frames(index, "sprites/towns/jurassica/buildings/",
+                                f"{bkey}_icon.png", f"{bkey} icon")
+        if not frames:
+            continue
         icon_sequences.append({
             "group": BUILDING_IDS[bkey],
-            "frames": [f"{bkey}_icon.png"]
+            "frames": frames
         })
     icons_anim = {
         "basepath": "sprites/towns/jurassica/buildings/",
         "sequences": icon_sequences
     }
-    icons_path = os.path.join(buildings_dir, "icons.json")
-    with open(icons_path, 'w') as f:
-        json.dump(icons_anim, f, indent='\t')
+    write_animation(os.path.join(buildings_dir, "icons.json"), icons_anim, index)
     print("  Building icons: icons.json")
 
-    print("\nDone! All animation JSONs generated.")
+    print(f"\nDone! All animation JSONs generated ({output_files.stats.summary()}).")
+
+    if index is None:
+        return []
+    if index.problems:
+        print(f"\n{len(index.problems)} problem(s) found on disk:")
+        for problem in index.problems:
+            print(f"  {problem}")
+    return index.problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate animation JSON descriptors for the Jurassica VCMI mod",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                       Frame lists from the built-in group tables
+  %(prog)s --from-disk           Frame lists from the PNGs that exist on disk
+  %(prog)s --from-disk --strict  Also exit with status 1 if anything is off
+        """,
+    )
+    parser.add_argument("--from-disk", action="store_true",
+                        help="Compile frame lists from the sprite directories")
+    parser.add_argument("--strict", action="store_true",
+                        help="With --from-disk, exit 1 if any problems were found")
+
+    args = parser.parse_args()
+
+    problems = generate_all(args.from_disk)
+    if args.strict and problems:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -5,14 +5,42 @@ Generate placeholder graphics for the Jurassica VCMI mod.
 Creates simple colored silhouette PNGs for all creatures, icons, town graphics,
 and hero portraits so the mod is loadable in VCMI before real art is created.
 
-Requirements: pip install Pillow
+Usage:
+  python generate_placeholders.py
+  python generate_placeholders.py --jobs 4
+  python generate_placeholders.py --force
+  python generate_placeholders.py --only creatures --creature trex,giganotosaurus
+  python generate_placeholders.py --only buildings --building dwelling7 --dry-run
+
+Only placeholders whose definition changed (or whose files are missing) since
+the last run are regenerated; .placeholder_manifest.json records what was
+generated from what. Existing files the generator did not write, such as real
+art, are never overwritten.
+
+Requirements: pip install Pillow numpy
 """
 
+import argparse
+import contextlib
+import functools
+import hashlib
+import io
+import json
 import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 from PIL import Image, ImageDraw, ImageFont
 
+import output_files
+
 BASE = os.path.dirname(os.path.abspath(__file__))
 CONTENT = os.path.join(BASE, "Mods", "jurassica", "Content")
+MANIFEST_PATH = os.path.join(BASE, ".placeholder_manifest.json")
+
+# Bump when drawing code changes, to regenerate every placeholder
+PLACEHOLDER_VERSION = 1
 
 # Creature definitions: (name, color, size_w, size_h, is_double_wide)
 CREATURES = [
@@ -40,23 +68,72 @@ HEROES = [
 ]
 
 
-def ensure_dir(path):
-    os.makedirs(path, exist_ok=True)
+# Paths saved (or, with dry_run, that would be saved) by the generation unit
+# currently running in this process, and existing files it left alone
+_written = []
+_kept = []
 
+# Content-relative path -> [size, mtime_ns] of the running unit's outputs as
+# recorded in the manifest by its previous run
+_previous_outputs = {}
 
-def draw_text_centered(draw, text, x, y, w, h, fill=(255, 255, 255)):
-    """Draw text centered in a bounding box, wrapping if needed."""
-    try:
-        font = ImageFont.truetype("/System/Library/Fonts/Helvetica.ttc", 11)
-    except (OSError, IOError):
+
+def ensure_dir(path, dry_run=False):
+    if not dry_run:
+        os.makedirs(path, exist_ok=True)
+
+
+def save_image(img, path, dry_run=False):
+    """Save a generated image (only if its bytes changed), recording the path
+    for the manifest. With dry_run, only the path is recorded.
+
+    An existing file that is not a recorded output of this unit, or that
+    changed since it was recorded, is someone else's art: unless it already
+    holds exactly these bytes it is left alone and recorded in _kept.
+    """
+    data = output_files.png_bytes(img)
+    if (os.path.exists(path)
+            and _previous_outputs.get(_content_rel(path)) != output_files.file_stat(path)
+            and not output_files.same_contents(path, data)):
+        _kept.append(path)
+        return
+    if not dry_run:
+        output_files.write_bytes(path, data)
+    _written.append(path)
+
+
+# Label fonts, tried in order; PIL's built-in bitmap font if none load
+FONT_CANDIDATES = [
+    "/System/Library/Fonts/Helvetica.ttc",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+]
+LABEL_FONT_SIZE = 11
+
+
+@functools.lru_cache(maxsize=None)
+def load_font(size=LABEL_FONT_SIZE):
+    """Resolve the label font once per process and size."""
+    for path in FONT_CANDIDATES:
         try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf", 11)
+            return ImageFont.truetype(path, size)
         except (OSError, IOError):
-            font = ImageFont.load_default()
+            continue
+    return ImageFont.load_default()
 
-    bbox = draw.textbbox((0, 0), text, font=font)
-    tw = bbox[2] - bbox[0]
-    th = bbox[3] - bbox[1]
+
+def _text_size(text, font):
+    bbox = font.getbbox(text)
+    return bbox[2] - bbox[0], bbox[3] - bbox[1]
+
+
+@functools.lru_cache(maxsize=None)
+def _text_layout(text, w, h, font):
+    """Lines of `text` and their offsets inside a w x h box, wrapping if needed.
+
+    Returns a tuple of ((dx, dy), line). Memoized, since the same labels are
+    drawn into the same boxes many times over.
+    """
+    tw, th = _text_size(text, font)
 
     # If text is too wide, try smaller or wrap
     if tw > w - 4:
@@ -69,36 +146,53 @@ def draw_text_centered(draw, text, x, y, w, h, fill=(255, 255, 255)):
         line1 = text[:space_pos].strip()
         line2 = text[space_pos:].strip()
 
-        bbox1 = draw.textbbox((0, 0), line1, font=font)
-        bbox2 = draw.textbbox((0, 0), line2, font=font)
-        tw1 = bbox1[2] - bbox1[0]
-        tw2 = bbox2[2] - bbox2[0]
+        tw1 = _text_size(line1, font)[0]
+        tw2 = _text_size(line2, font)[0]
 
-        tx1 = x + (w - tw1) // 2
-        tx2 = x + (w - tw2) // 2
-        ty = y + (h - th * 2 - 4) // 2
-        draw.text((tx1, ty), line1, fill=fill, font=font)
-        draw.text((tx2, ty + th + 2), line2, fill=fill, font=font)
-    else:
-        tx = x + (w - tw) // 2
-        ty = y + (h - th) // 2
-        draw.text((tx, ty), text, fill=fill, font=font)
+        ty = (h - th * 2 - 4) // 2
+        return (((w - tw1) // 2, ty), line1), (((w - tw2) // 2, ty + th + 2), line2)
 
+    return (((w - tw) // 2, (h - th) // 2), text),
 
-def create_creature_frame(name, color, w, h, label="idle"):
-    """Create a single creature sprite frame with a colored silhouette."""
+
+def draw_text_centered(draw, text, x, y, w, h, fill=(255, 255, 255), font_size=LABEL_FONT_SIZE):
+    """Draw text centered in a bounding box, wrapping if needed."""
+    font = load_font(font_size)
+    for (dx, dy), line in _text_layout(text, w, h, font):
+        draw.text((x + dx, y + dy), line, fill=fill, font=font)
+
+
+CREATURE_MARGIN = 8
+
+
+@functools.lru_cache(maxsize=None)
+def _creature_base_layer(name, color, w, h):
+    """Body and name of a creature frame, everything but the per-frame label.
+
+    Rendered once per creature; frames are stamped from copies of it.
+    """
     img = Image.new("RGBA", (w, h), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
 
     # Draw a simple dinosaur-ish shape
-    margin = 8
+    margin = CREATURE_MARGIN
     body_rect = [margin, margin, w - margin, h - margin]
 
     # Body ellipse
     draw.ellipse(body_rect, fill=color + (220,), outline=(0, 0, 0, 255), width=2)
 
-    # Name and label
+    # Name
     draw_text_centered(draw, name, margin, margin, w - 2*margin, (h - 2*margin) // 2)
+
+    return img
+
+
+def create_creature_frame(name, color, w, h, label="idle"):
+    """Create a single creature sprite frame with a colored silhouette."""
+    img = _creature_base_layer(name, color, w, h).copy()
+    draw = ImageDraw.Draw(img)
+
+    margin = CREATURE_MARGIN
     draw_text_centered(draw, f"[{label}]", margin, h//2, w - 2*margin, (h - 2*margin) // 2,
                        fill=(200, 200, 200))
 
@@ -106,7 +200,16 @@ def create_creature_frame(name, color, w, h, label="idle"):
 
 
 def create_icon(name, color, size, label=""):
-    """Create a creature or town icon."""
+    """Create a creature or town icon.
+
+    Icons are not downscaled from one master size: the labels are drawn at a
+    fixed font size and would shrink. Identical icons are rendered once.
+    """
+    return _render_icon(name, color, size, label).copy()
+
+
+@functools.lru_cache(maxsize=None)
+def _render_icon(name, color, size, label):
     img = Image.new("RGBA", (size, size), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
 
@@ -120,35 +223,129 @@ def create_icon(name, color, size, label=""):
     return img
 
 
-def create_town_background():
-    """Create a placeholder town background (800x374)."""
-    img = Image.new("RGB", (800, 374), (60, 80, 40))
-    draw = ImageDraw.Draw(img)
+def create_missile():
+    """Create a placeholder missile sprite."""
+    missile = Image.new("RGBA", (20, 6), (0, 0, 0, 0))
+    md = ImageDraw.Draw(missile)
+    md.polygon([(0, 1), (0, 4), (18, 3)], fill=(180, 160, 100, 200))
+    return missile
+
+
+# Background scenes, described in 1x pixel coordinates and rendered at any
+# integer scale. Layers are applied in order:
+#   ("fill", color)                               whole canvas
+#   ("gradient", y0, y1, start, rows_per_step)    rows y0..y1-1; channel c is
+#       start[c] + (y - y0) // rows_per_step[c], clamped to 255
+#   ("polygon", points, color)
+#   ("rect", box, color)                          filled, box corners inclusive
+#   ("outline", box, color, width)
+#   ("label", text, box, color)                   box is (x, y, w, h)
+TOWN_SCENE = [
+    ("fill", (60, 80, 40)),
+    # Sky
+    ("gradient", 0, 150, (80, 100, 140), (1, 2, 3)),
+    # Volcano
+    ("polygon", [(350, 50), (450, 50), (500, 150), (300, 150)], (100, 60, 40)),
+    ("polygon", [(370, 50), (430, 50), (420, 30), (380, 30)], (200, 80, 30)),
+    # Ground
+    ("rect", (0, 200, 800, 374), (80, 100, 50)),
+] + [
+    # Jungle trees
+    layer
+    for x in [50, 150, 650, 730]
+    for layer in [("polygon", [(x, 180), (x + 40, 180), (x + 20, 120)], (30, 100, 30)),
+                  ("rect", (x + 15, 180, x + 25, 200), (100, 70, 40))]
+] + [
+    ("label", "JURASSICA — Placeholder Town Screen", (200, 300, 400, 50), (200, 200, 150)),
+]
+TOWN_SIZE = (800, 374)
 
-    # Sky gradient (simple)
-    for y in range(150):
-        r = 80 + y
-        g = 100 + y // 2
-        b = 140 + y // 3
-        draw.line([(0, y), (799, y)], fill=(min(r, 255), min(g, 255), min(b, 255)))
+# Screens that reuse the rendered town scene under a per-channel RGB tint
+TOWN_TINTS = {
+    "townBackground.png": (1.0, 1.0, 1.0),
+    "guildWindow.png": (0.85, 0.75, 1.1),
+    "hallBackground.png": (1.1, 0.95, 0.8),
+}
 
-    # Volcano
-    draw.polygon([(350, 50), (450, 50), (500, 150), (300, 150)], fill=(100, 60, 40))
-    draw.polygon([(370, 50), (430, 50), (420, 30), (380, 30)], fill=(200, 80, 30))
 
-    # Ground
-    draw.rectangle([0, 200, 800, 374], fill=(80, 100, 50))
+def _creature_panel_scene(size):
+    return [
+        ("fill", (40, 60, 30, 200)),
+        ("outline", (2, 2, size - 2, size - 2), (100, 80, 40, 200), 2),
+    ]
 
-    # Jungle trees
-    for x in [50, 150, 650, 730]:
-        draw.polygon([(x, 180), (x + 40, 180), (x + 20, 120)], fill=(30, 100, 30))
-        draw.rectangle([x + 15, 180, x + 25, 200], fill=(100, 70, 40))
 
-    # Label
-    draw_text_centered(draw, "JURASSICA — Placeholder Town Screen", 200, 300, 400, 50,
-                       fill=(200, 200, 150))
+# Creature info panel backgrounds: filename -> 1x size
+CREATURE_PANELS = {"creatBg120.png": 120, "creatBg130.png": 130}
+
+# Output scales for town screen backgrounds, relative to Content/
+BACKGROUND_SCALES = {1: "sprites", 2: "Sprites2x"}
+
+
+def render_scene(layers, size, scale=1, mode="RGB"):
+    """Render a scene description at `scale` times its 1x size.
+
+    Fills and gradients are computed as whole numpy arrays; shapes are one
+    ImageDraw call each, on coordinates scaled up front.
+    """
+    w, h = size[0] * scale, size[1] * scale
+    channels = len(mode)
+    arr = np.zeros((h, w, channels), dtype=np.uint8)
+
+    def box(b):
+        # Inclusive corners: pixel x at 1x covers x*scale .. x*scale + scale - 1
+        return [b[0] * scale, b[1] * scale, b[2] * scale + scale - 1, b[3] * scale + scale - 1]
+
+    img = draw = None
+    for layer in layers:
+        kind = layer[0]
+        if kind in ("fill", "gradient") and img is not None:
+            arr, img, draw = np.array(img), None, None
+
+        if kind == "fill":
+            arr[:, :] = layer[1]
+        elif kind == "gradient":
+            _, y0, y1, start, rows_per_step = layer
+            rows = np.arange((y1 - y0) * scale)[:, None]
+            steps = np.array(rows_per_step) * scale
+            colors = np.minimum(np.array(start) + rows // steps, 255)
+            arr[y0 * scale:y1 * scale, :, :len(start)] = colors[:, None, :]
+        else:
+            if img is None:
+                img = Image.fromarray(arr)
+                draw = ImageDraw.Draw(img)
+            if kind == "polygon":
+                draw.polygon([(x * scale, y * scale) for x, y in layer[1]], fill=layer[2])
+            elif kind == "rect":
+                draw.rectangle(box(layer[1]), fill=layer[2])
+            elif kind == "outline":
+                draw.rectangle(box(layer[1]), outline=layer[2], width=layer[3] * scale)
+            elif kind == "label":
+                x, y, bw, bh = (v * scale for v in layer[2])
+                draw_text_centered(draw, layer[1], x, y, bw, bh, fill=layer[3],
+                                   font_size=LABEL_FONT_SIZE * scale)
+            else:
+                raise ValueError(f"unknown scene layer '{kind}'")
+
+    return img if img is not None else Image.fromarray(arr)
+
+
+def tint(img, factors):
+    """Multiply the RGB channels by per-channel factors, clamped to 255.
+
+    Applied as one lookup table over the whole image.
+    """
+    if all(f == 1.0 for f in factors):
+        return img
+    lut = [min(255, int(v * f)) for f in factors for v in range(256)]
+    if img.mode == "RGBA":
+        lut += list(range(256))
+    return img.point(lut)
 
-    return img
+
+def create_town_background(scale=1):
+    """Create a placeholder town background (800x374 times scale)."""
+    return render_scene(TOWN_SCENE, TOWN_SIZE, scale)
 
 
 def create_hero_portrait(name, size, is_large=False):
@@ -162,8 +359,8 @@ def create_hero_portrait(name, size, is_large=False):
 
     draw = ImageDraw.Draw(img)
 
-    # Hash name for consistent color
-    hsh = hash(name) % 360
+    # Hash name for consistent color (crc32, not the per-process salted hash())
+    hsh = zlib.crc32(name.encode()) % 360
     r = 100 + (hsh * 7) % 120
     g = 80 + (hsh * 13) % 120
     b = 80 + (hsh * 17) % 120
@@ -306,175 +503,459 @@ def create_building_sprite(name, label, color, w=100, h=80):
     return img
 
 
-def generate_all():
-    print("Generating placeholder graphics for Jurassica mod...")
+# Animation groups for creatures (minimal set for MVP)
+# Group 0: Moving, Group 1: Idle/Hover, Group 2: Getting hit
+# Group 4: Death, Group 11: Attack up, Group 12: Attack front, Group 13: Attack down
+# Group 20: Start moving, Group 21: End moving
+ANIM_GROUPS = {
+    0: ("move", 4),      # Moving - 4 frames
+    1: ("idle", 3),      # Idle - 3 frames
+    2: ("hit", 3),       # Getting hit - 3 frames
+    3: ("defend", 2),    # Defend - 2 frames
+    4: ("death", 4),     # Death - 4 frames
+    11: ("atkUp", 4),    # Attack up - 4 frames
+    12: ("atkFwd", 4),   # Attack forward - 4 frames
+    13: ("atkDwn", 4),   # Attack down - 4 frames
+    20: ("startMove", 2),  # Start moving
+    21: ("endMove", 2),    # End moving
+}
+
+RANGED_GROUPS = {
+    14: ("shootUp", 4),
+    15: ("shootFwd", 4),
+    16: ("shootDwn", 4),
+}
+
+RANGED_CREATURES = {"pterodactyl", "quetzalcoatlus"}
+
+
+def generate_creature(sprites_dir, icons_dir, name, color, w, h, dry_run=False):
+    """Battle frames, map sprite, icons and missile for one creature.
+
+    Returns the number of sprite frames written.
+    """
+    creature_dir = os.path.join(sprites_dir, "creatures", name)
+    ensure_dir(creature_dir, dry_run)
+    frames = 0
+
+    groups = dict(ANIM_GROUPS)
+    if name in RANGED_CREATURES:
+        groups.update(RANGED_GROUPS)
+
+    # Generate frames for each animation group
+    for group_id, (label, num_frames) in groups.items():
+        for frame_idx in range(num_frames):
+            frame_label = f"{label}{frame_idx+1}"
+            frame = create_creature_frame(name, color, w, h, frame_label)
+            frame_path = os.path.join(creature_dir, f"{label}_{frame_idx:02d}.png")
+            save_image(frame, frame_path, dry_run)
+            frames += 1
+
+    # Adventure map sprite (single frame for now)
+    map_frame = create_adventure_map_sprite(name, color)
+    save_image(map_frame, os.path.join(creature_dir, "map_00.png"), dry_run)
+    frames += 1
+
+    # Creature icons
+    icon_small = create_icon(name, color, 32)
+    save_image(icon_small, os.path.join(icons_dir, f"{name}Small.png"), dry_run)
+
+    icon_large = create_icon(name, color, 58, name)
+    save_image(icon_large, os.path.join(icons_dir, f"{name}Large.png"), dry_run)
+
+    # Missile sprite for ranged creatures (the same image for every angle)
+    if name in RANGED_CREATURES:
+        missile = create_missile()
+        for angle_idx in range(13):
+            save_image(missile, os.path.join(creature_dir, f"missile_{angle_idx:02d}.png"), dry_run)
+            frames += 1
+
+    print(f"  {name}: generated frames + icons")
+    return frames
+
+
+def generate_town_screen(content_dir, dry_run=False):
+    """Town, guild and hall backgrounds plus the creature info panel backgrounds,
+    at every scale in BACKGROUND_SCALES.
+
+    The town scene is rendered once per scale; guild and hall screens are
+    tints of it. Painted backgrounds already in place are kept (see
+    save_image).
+    """
+    for scale, sprites_root in BACKGROUND_SCALES.items():
+        towns_dir = os.path.join(content_dir, sprites_root, "towns", "jurassica")
+        ensure_dir(towns_dir, dry_run)
 
-    sprites_dir = os.path.join(CONTENT, "sprites")
-    icons_dir = os.path.join(sprites_dir, "icons")
-    towns_dir = os.path.join(sprites_dir, "towns", "jurassica")
-    adventure_dir = os.path.join(sprites_dir, "adventure")
-    heroes_dir = os.path.join(sprites_dir, "heroes")
-    buildings_dir = os.path.join(towns_dir, "buildings")
+        town_bg = create_town_background(scale)
+        for filename, factors in TOWN_TINTS.items():
+            save_image(tint(town_bg, factors), os.path.join(towns_dir, filename), dry_run)
 
-    ensure_dir(icons_dir)
-    ensure_dir(towns_dir)
-    ensure_dir(adventure_dir)
-    ensure_dir(heroes_dir)
-    ensure_dir(buildings_dir)
-
-    # Animation groups for creatures (minimal set for MVP)
-    # Group 0: Moving, Group 1: Idle/Hover, Group 2: Getting hit
-    # Group 4: Death, Group 11: Attack up, Group 12: Attack front, Group 13: Attack down
-    # Group 20: Start moving, Group 21: End moving
-    ANIM_GROUPS = {
-        0: ("move", 4),      # Moving - 4 frames
-        1: ("idle", 3),      # Idle - 3 frames
-        2: ("hit", 3),       # Getting hit - 3 frames
-        3: ("defend", 2),    # Defend - 2 frames
-        4: ("death", 4),     # Death - 4 frames
-        11: ("atkUp", 4),    # Attack up - 4 frames
-        12: ("atkFwd", 4),   # Attack forward - 4 frames
-        13: ("atkDwn", 4),   # Attack down - 4 frames
-        20: ("startMove", 2),  # Start moving
-        21: ("endMove", 2),    # End moving
-    }
+        # Creature backgrounds for info panels
+        for filename, size in CREATURE_PANELS.items():
+            bg = render_scene(_creature_panel_scene(size), (size, size), scale, "RGBA")
+            save_image(bg, os.path.join(towns_dir, filename), dry_run)
+    return 0
 
-    RANGED_GROUPS = {
-        14: ("shootUp", 4),
-        15: ("shootFwd", 4),
-        16: ("shootDwn", 4),
-    }
 
-    ranged_creatures = {"pterodactyl", "quetzalcoatlus"}
-
-    total_frames = 0
-
-    for name, color, w, h, is_wide in CREATURES:
-        creature_dir = os.path.join(sprites_dir, "creatures", name)
-        ensure_dir(creature_dir)
-
-        groups = dict(ANIM_GROUPS)
-        if name in ranged_creatures:
-            groups.update(RANGED_GROUPS)
-
-        # Generate frames for each animation group
-        for group_id, (label, num_frames) in groups.items():
-            for frame_idx in range(num_frames):
-                frame_label = f"{label}{frame_idx+1}"
-                frame = create_creature_frame(name, color, w, h, frame_label)
-                frame_path = os.path.join(creature_dir, f"{label}_{frame_idx:02d}.png")
-                frame.save(frame_path)
-                total_frames += 1
-
-        # Adventure map sprite (single frame for now)
-        map_frame = create_adventure_map_sprite(name, color)
-        map_frame.save(os.path.join(creature_dir, "map_00.png"))
-        total_frames += 1
-
-        # Creature icons
-        icon_small = create_icon(name, color, 32)
-        icon_small.save(os.path.join(icons_dir, f"{name}Small.png"))
-
-        icon_large = create_icon(name, color, 58, name)
-        icon_large.save(os.path.join(icons_dir, f"{name}Large.png"))
-
-        # Missile sprite for ranged creatures
-        if name in ranged_creatures:
-            missile_dir = creature_dir
-            for angle_idx in range(13):
-                missile = Image.new("RGBA", (20, 6), (0, 0, 0, 0))
-                md = ImageDraw.Draw(missile)
-                md.polygon([(0, 1), (0, 4), (18, 3)], fill=(180, 160, 100, 200))
-                missile.save(os.path.join(missile_dir, f"missile_{angle_idx:02d}.png"))
-                total_frames += 1
-
-        print(f"  {name}: generated frames + icons")
-
-    # Town screen graphics
-    print("  Generating town screen...")
-    town_bg = create_town_background()
-    town_bg.save(os.path.join(towns_dir, "townBackground.png"))
-
-    # Guild and hall backgrounds (reuse town bg with different tints)
-    guild_bg = town_bg.copy()
-    guild_bg.save(os.path.join(towns_dir, "guildWindow.png"))
-    hall_bg = town_bg.copy()
-    hall_bg.save(os.path.join(towns_dir, "hallBackground.png"))
-
-    # Creature backgrounds for info panels
-    for size, filename in [(120, "creatBg120.png"), (130, "creatBg130.png")]:
-        bg = Image.new("RGBA", (size, size), (40, 60, 30, 200))
-        draw = ImageDraw.Draw(bg)
-        draw.rectangle([2, 2, size-2, size-2], outline=(100, 80, 40, 200), width=2)
-        bg.save(os.path.join(towns_dir, filename))
-
-    # Town icons (village/fort small/large, normal/built)
-    print("  Generating town icons...")
+def generate_town_icons(icons_dir, dry_run=False):
+    """Town icons (village/fort small/large, normal/built)."""
     for variant in ["Village", "Fort"]:
         for state in ["", "Built"]:
             for size_name, size in [("Small", 32), ("Large", 58)]:
                 icon = create_icon(f"J-{variant[0]}", (60, 100, 50), size, f"J {variant[:3]}")
-                icon.save(os.path.join(icons_dir, f"town{variant}{state}{size_name}.png"))
+                icon_path = os.path.join(icons_dir, f"town{variant}{state}{size_name}.png")
+                save_image(icon, icon_path, dry_run)
+    return 0
 
-    # Adventure map town sprites
-    print("  Generating adventure map sprites...")
+
+def generate_adventure_sprites(adventure_dir, dry_run=False):
+    """Adventure map town sprites."""
     for variant in ["Village", "Fort", "Castle"]:
         sprite = create_adventure_map_sprite(f"J-{variant[0]}", (60, 100, 50))
         sprite_path = os.path.join(adventure_dir, f"jurassica{variant}.png")
-        sprite.save(sprite_path)
-
-    # Hero portraits
-    print("  Generating hero portraits...")
-    for hero_name in HEROES:
-        for suffix, is_large in [("Small", False), ("Large", True)]:
-            portrait = create_hero_portrait(hero_name, 0, is_large)
-            portrait.save(os.path.join(heroes_dir, f"{hero_name}{suffix}.png"))
-
-        # Specialty icons (small only)
-        spec_icon = create_icon(hero_name[:4], (180, 150, 80), 32, f"S:{hero_name[:4]}")
-        spec_icon.save(os.path.join(heroes_dir, f"{hero_name}SpecSmall.png"))
-        spec_icon_lg = create_icon(hero_name[:4], (180, 150, 80), 58, f"S:{hero_name[:5]}")
-        spec_icon_lg.save(os.path.join(heroes_dir, f"{hero_name}SpecLarge.png"))
-
-    # Hero adventure map sprites (directional, 8 directions x 4 frames)
-    print("  Generating hero map sprites...")
-    for class_name, class_color in HERO_CLASSES_MAP:
-        for direction in range(8):
-            for frame_idx in range(4):
-                frame = create_hero_map_frame(class_color, direction, frame_idx)
-                frame.save(os.path.join(heroes_dir, f"{class_name}Map_dir{direction}_f{frame_idx}.png"))
-                total_frames += 1
-        print(f"    {class_name}: 32 map frames (8 dirs x 4 frames)")
-
-    # Building placeholder sprites + area/border masks
-    print("  Generating building placeholders...")
-    for bkey, blabel, bcolor in BUILDINGS:
-        bw, bh = 100, 80
-        # Main building sprite
-        bimg = create_building_sprite(bkey, blabel, bcolor, bw, bh)
-        bimg.save(os.path.join(buildings_dir, f"{bkey}.png"))
-
-        # Area mask — solid filled rectangle (non-transparent = clickable)
-        area = Image.new("RGBA", (bw, bh), (255, 255, 255, 255))
-        area.save(os.path.join(buildings_dir, f"{bkey}_area.png"))
-
-        # Border mask — gold outline shown on hover
-        border = Image.new("RGBA", (bw, bh), (0, 0, 0, 0))
-        bd = ImageDraw.Draw(border)
-        bd.rectangle([0, 0, bw - 1, bh - 1], outline=(255, 220, 100, 255), width=2)
-        border.save(os.path.join(buildings_dir, f"{bkey}_border.png"))
-    print(f"  Generated {len(BUILDINGS)} building sprites + area/border masks")
-
-    # Building hall icons (44x44 for hall screen)
-    print("  Generating building hall icons...")
-    for bkey, blabel, bcolor in BUILDINGS:
-        bicon = create_icon(bkey[:6], bcolor, 44, blabel[:8])
-        bicon.save(os.path.join(buildings_dir, f"{bkey}_icon.png"))
-    print(f"  Generated {len(BUILDINGS)} building icons")
+        save_image(sprite, sprite_path, dry_run)
+    return 0
+
+
+def generate_hero(heroes_dir, hero_name, dry_run=False):
+    """Small/large portraits and specialty icons for one hero."""
+    for suffix, is_large in [("Small", False), ("Large", True)]:
+        portrait = create_hero_portrait(hero_name, 0, is_large)
+        save_image(portrait, os.path.join(heroes_dir, f"{hero_name}{suffix}.png"), dry_run)
+
+    # Specialty icons (small only)
+    spec_icon = create_icon(hero_name[:4], (180, 150, 80), 32, f"S:{hero_name[:4]}")
+    save_image(spec_icon, os.path.join(heroes_dir, f"{hero_name}SpecSmall.png"), dry_run)
+    spec_icon_lg = create_icon(hero_name[:4], (180, 150, 80), 58, f"S:{hero_name[:5]}")
+    save_image(spec_icon_lg, os.path.join(heroes_dir, f"{hero_name}SpecLarge.png"), dry_run)
+    return 0
+
+
+def generate_hero_map_sprites(heroes_dir, class_name, class_color, dry_run=False):
+    """Hero adventure map sprites for one class (8 directions x 4 frames)."""
+    frames = 0
+    for direction in range(8):
+        for frame_idx in range(4):
+            frame = create_hero_map_frame(class_color, direction, frame_idx)
+            frame_path = os.path.join(heroes_dir,
+                                      f"{class_name}Map_dir{direction}_f{frame_idx}.png")
+            save_image(frame, frame_path, dry_run)
+            frames += 1
+    print(f"    {class_name}: 32 map frames (8 dirs x 4 frames)")
+    return frames
+
+
+def generate_building(buildings_dir, bkey, blabel, bcolor, dry_run=False):
+    """Placeholder sprite plus area/border masks for one building."""
+    bw, bh = 100, 80
+    # Main building sprite
+    bimg = create_building_sprite(bkey, blabel, bcolor, bw, bh)
+    save_image(bimg, os.path.join(buildings_dir, f"{bkey}.png"), dry_run)
+
+    # Area mask — solid filled rectangle (non-transparent = clickable)
+    area = Image.new("RGBA", (bw, bh), (255, 255, 255, 255))
+    save_image(area, os.path.join(buildings_dir, f"{bkey}_area.png"), dry_run)
+
+    # Border mask — gold outline shown on hover
+    border = Image.new("RGBA", (bw, bh), (0, 0, 0, 0))
+    bd = ImageDraw.Draw(border)
+    bd.rectangle([0, 0, bw - 1, bh - 1], outline=(255, 220, 100, 255), width=2)
+    save_image(border, os.path.join(buildings_dir, f"{bkey}_border.png"), dry_run)
+    return 0
+
+
+def generate_building_icon(buildings_dir, bkey, blabel, bcolor, dry_run=False):
+    """44x44 hall screen icon for one building."""
+    bicon = create_icon(bkey[:6], bcolor, 44, blabel[:8])
+    save_image(bicon, os.path.join(buildings_dir, f"{bkey}_icon.png"), dry_run)
+    return 0
+
+
+def _run_unit(job):
+    """Worker entry point: run one generation unit.
+
+    job is (unit, previous outputs, dry_run), the previous outputs being the
+    unit's manifest "outputs" ({} if it has no entry). Returns (frames,
+    captured log, paths written, or that would be written with dry_run,
+    existing paths kept, output stats).
+    """
+    (_, func, args), previous_outputs, dry_run = job
+    del _written[:], _kept[:]
+    _previous_outputs.clear()
+    _previous_outputs.update(previous_outputs)
+    output_files.reset_stats()
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        frames = func(*args, dry_run=dry_run)
+    return frames, log.getvalue(), list(_written), list(_kept), output_files.reset_stats()
+
+
+# Generation targets for --only, by unit manifest key prefix
+GENERATION_TARGETS = {
+    "creature": "creatures",
+    "town_screen": "town",
+    "town_icons": "town",
+    "adventure": "town",
+    "hero": "heroes",
+    "hero_map": "heroes",
+    "building": "buildings",
+    "building_icon": "buildings",
+}
+
+
+def _unit_selected(key, only, names):
+    """True if the unit with manifest key `key` is in the selected targets.
+
+    only is a set of target names (None = all); names maps a target to the
+    entry names to keep within it (e.g. {"creatures": {"trex"}}).
+    """
+    prefix, _, name = key.partition("/")
+    target = GENERATION_TARGETS[prefix]
+    if only is not None and target not in only:
+        return False
+    return target not in names or name in names[target]
+
+
+# Shared tables a unit's output depends on, beyond its own arguments
+_UNIT_TABLES = {
+    "generate_creature": lambda: [ANIM_GROUPS, RANGED_GROUPS, sorted(RANGED_CREATURES)],
+    "generate_town_screen": lambda: [TOWN_SCENE, TOWN_SIZE, TOWN_TINTS, CREATURE_PANELS,
+                                     [_creature_panel_scene(size)
+                                      for size in CREATURE_PANELS.values()],
+                                     BACKGROUND_SCALES],
+}
+
+
+def _content_rel(path):
+    return os.path.relpath(path, CONTENT)
+
+
+def _unit_fingerprint(unit, font_id):
+    """Digest of everything that defines a unit's outputs."""
+    _, func, args = unit
+    params = {
+        "version": PLACEHOLDER_VERSION,
+        "font": font_id,
+        "unit": func.__name__,
+        "args": [_content_rel(a) if isinstance(a, str) and os.path.isabs(a) else a
+                 for a in args],
+        "tables": _UNIT_TABLES.get(func.__name__, list)(),
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def load_manifest():
+    """Load the placeholder manifest, or an empty one if missing/stale/corrupt."""
+    try:
+        with open(MANIFEST_PATH, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": PLACEHOLDER_VERSION, "units": {}}
+    if manifest.get("version") != PLACEHOLDER_VERSION:
+        return {"version": PLACEHOLDER_VERSION, "units": {}}
+    return manifest
+
+
+def save_manifest(manifest):
+    """Write the manifest atomically (skipped if unchanged)."""
+    output_files.write_json(MANIFEST_PATH, manifest, count=False, indent=2, sort_keys=True)
+
+
+def _is_current(entry, fingerprint):
+    """True if a unit's recorded fingerprint matches and its outputs all exist.
+
+    Outputs that changed on disk do not count: they are usually real art
+    written over a placeholder, which must not be regenerated.
+    """
+    if not entry or entry["fingerprint"] != fingerprint:
+        return False
+    return all(os.path.exists(os.path.join(CONTENT, rel_path))
+               for rel_path in list(entry["outputs"]) + entry.get("kept", []))
+
+
+def generate_all(jobs=1, force=False, only=None, names=None, dry_run=False):
+    """Generate every placeholder, spreading independent units over `jobs` processes.
+
+    Units are independent (one creature, hero, hero class or building each),
+    so with jobs > 1 they run on a process pool. Their logs are printed in
+    the same order as a serial run.
+
+    A manifest fingerprints each unit's definition. Units whose definition
+    is unchanged and whose outputs all exist are not rerun (or written)
+    unless force is set. Even then, existing files the generator did not
+    write are kept (see save_image).
+
+    only and names restrict generation to some targets (see _unit_selected).
+    With dry_run, the files that would be written are listed instead.
+    """
+    names = names or {}
+    print("Generating placeholder graphics for Jurassica mod...")
+
+    sprites_dir = os.path.join(CONTENT, "sprites")
+    icons_dir = os.path.join(sprites_dir, "icons")
+    towns_dir = os.path.join(sprites_dir, "towns", "jurassica")
+    adventure_dir = os.path.join(sprites_dir, "adventure")
+    heroes_dir = os.path.join(sprites_dir, "heroes")
+    buildings_dir = os.path.join(towns_dir, "buildings")
+
+    for directory in (icons_dir, towns_dir, adventure_dir, heroes_dir, buildings_dir):
+        ensure_dir(directory, dry_run)
+
+    # (header, units, footer): every unit is (manifest key, function, args)
+    # and returns its frame count
+    sections = [
+        (None, [(f"creature/{name}", generate_creature,
+                 (sprites_dir, icons_dir, name, color, w, h))
+                for name, color, w, h, _ in CREATURES], None),
+        ("  Generating town screen...",
+         [("town_screen", generate_town_screen, (CONTENT,))], None),
+        ("  Generating town icons...",
+         [("town_icons", generate_town_icons, (icons_dir,))], None),
+        ("  Generating adventure map sprites...",
+         [("adventure", generate_adventure_sprites, (adventure_dir,))], None),
+        ("  Generating hero portraits...",
+         [(f"hero/{hero_name}", generate_hero, (heroes_dir, hero_name))
+          for hero_name in HEROES], None),
+        ("  Generating hero map sprites...",
+         [(f"hero_map/{class_name}", generate_hero_map_sprites,
+           (heroes_dir, class_name, class_color))
+          for class_name, class_color in HERO_CLASSES_MAP], None),
+        ("  Generating building placeholders...",
+         [(f"building/{building[0]}", generate_building, (buildings_dir,) + building)
+          for building in BUILDINGS],
+         "  Generated {} building sprites + area/border masks"),
+        ("  Generating building hall icons...",
+         [(f"building_icon/{building[0]}", generate_building_icon,
+           (buildings_dir,) + building) for building in BUILDINGS],
+         "  Generated {} building icons"),
+    ]
+    sections = [(header, [unit for unit in section_units if _unit_selected(unit[0], only, names)],
+                 footer) for header, section_units, footer in sections]
+    sections = [section for section in sections if section[1]]
+    units = [unit for _, section_units, _ in sections for unit in section_units]
+
+    manifest = load_manifest()
+    font_id = getattr(load_font(), "path", "default")
+    fingerprints = {unit[0]: _unit_fingerprint(unit, font_id) for unit in units}
+    stale = [unit for unit in units
+             if force or not _is_current(manifest["units"].get(unit[0]), fingerprints[unit[0]])]
+    stale_keys = {unit[0] for unit in stale}
+    jobs_args = [(unit, manifest["units"].get(unit[0], {}).get("outputs", {}), dry_run)
+                 for unit in stale]
+
+    with contextlib.ExitStack() as stack:
+        if jobs > 1 and len(stale) > 1:
+            executor = stack.enter_context(ProcessPoolExecutor(max_workers=min(jobs, len(stale))))
+            results = executor.map(_run_unit, jobs_args)
+        else:
+            results = map(_run_unit, jobs_args)
+
+        total_frames = total_kept = 0
+        file_stats = output_files.OutputStats()
+        for header, section_units, footer in sections:
+            if header:
+                print(header)
+            for key, _, _ in section_units:
+                if key not in stale_keys:
+                    total_frames += manifest["units"][key]["frames"]
+                    continue
+                frames, log, written, kept, unit_stats = next(results)
+                file_stats.add(unit_stats)
+                total_frames += frames
+                if dry_run:
+                    for path in written:
+                        print(f"    would write {_content_rel(path)}")
+                    for path in kept:
+                        print(f"    would keep existing art: {_content_rel(path)}")
+                    continue
+                print(log, end="")
+                total_kept += len(kept)
+                if kept:
+                    print(f"    kept {len(kept)} existing file(s) the generator did not write, "
+                          f"e.g. {_content_rel(kept[0])}")
+                manifest["units"][key] = {
+                    "fingerprint": fingerprints[key],
+                    "frames": frames,
+                    "outputs": {_content_rel(path): output_files.file_stat(path)
+                                for path in written},
+                    "kept": sorted(_content_rel(path) for path in kept),
+                }
+            if footer and not dry_run:
+                print(footer.format(len(section_units)))
+
+    if dry_run:
+        print(f"\nDry run: {len(stale)} of {len(units)} units would be regenerated "
+              f"({len(units) - len(stale)} unchanged)")
+        return
+
+    save_manifest(manifest)
 
     print(f"\nDone! Generated {total_frames} sprite frames + icons, portraits, town graphics, and buildings.")
+    print(f"Regenerated {len(stale)} of {len(units)} units ({len(units) - len(stale)} unchanged), "
+          f"files: {file_stats.summary()}")
+    if total_kept:
+        print(f"Kept {total_kept} existing file(s) the generator did not write "
+              f"(delete a file to have it regenerated)")
     print(f"All files saved under: {CONTENT}/sprites/")
 
 
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate placeholder graphics for the Jurassica VCMI mod",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                     Regenerate what changed, one worker per CPU
+  %(prog)s --jobs 1            Generate serially
+  %(prog)s --force             Regenerate everything, ignoring the manifest
+  %(prog)s --only creatures --creature trex,giganotosaurus
+  %(prog)s --only buildings --building dwelling7
+  %(prog)s --only heroes,town --dry-run
+        """,
+    )
+    parser.add_argument("--jobs", type=int, default=0, metavar="N",
+                        help="Worker processes (default 0 = one per CPU)")
+    parser.add_argument("--force", action="store_true",
+                        help="Regenerate every placeholder, even if unchanged")
+    parser.add_argument("--only", metavar="TARGETS",
+                        help="Comma-separated targets: creatures, heroes, buildings, town")
+    parser.add_argument("--creature", metavar="NAMES", help="Only these creatures")
+    parser.add_argument("--hero", metavar="NAMES",
+                        help="Only these heroes (or hero classes, for map sprites)")
+    parser.add_argument("--building", metavar="NAMES", help="Only these buildings")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="List the files that would be written without writing them")
+
+    args = parser.parse_args()
+
+    only = None
+    if args.only:
+        only = set(args.only.split(","))
+        unknown = only - set(GENERATION_TARGETS.values())
+        if unknown:
+            parser.error(f"unknown target(s): {', '.join(sorted(unknown))} "
+                         f"(choose from creatures, heroes, buildings, town)")
+
+    names = {}
+    for target, value, valid in [
+            ("creatures", args.creature, [c[0] for c in CREATURES]),
+            ("heroes", args.hero, HEROES + [c[0] for c in HERO_CLASSES_MAP]),
+            ("buildings", args.building, [b[0] for b in BUILDINGS])]:
+        if not value:
+            continue
+        names[target] = set(value.split(","))
+        unknown = names[target] - set(valid)
+        if unknown:
+            parser.error(f"unknown {target}: {', '.join(sorted(unknown))}")
+    # Naming entries without --only selects just their targets
+    if only is None and names:
+        only = set(names)
+
+    if args.jobs < 1:
+        args.jobs = os.cpu_count() or 1
+
+    generate_all(args.jobs, args.force, only, names, args.dry_run)
+
+
 if __name__ == "__main__":
-    generate_all()
+    main()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Losslessly shrink every PNG in the Jurassica mod tree.
+
+For each image, tries the exact lossless encodings that fit its pixels:
+  - grayscale / grayscale + alpha when every pixel is gray
+  - RGB when fully opaque, otherwise RGBA
+each at zlib level 9 with several compression strategies, and keeps the
+smallest. Images are never converted to or from palette mode: VCMI gives the
+first palette indices of creature images special meaning (transparency,
+shadow, selection), so indexed files are left exactly as they are. Metadata chunks (text, ICC, gamma, timestamps) are dropped. A file
+is only rewritten when the result is smaller and decodes to exactly the same
+RGBA pixels.
+
+Files are processed in parallel. A manifest (.png_optimize_cache.json)
+remembers each file's size, mtime and hash after the last run, so unchanged
+files are skipped without being decoded. Rewritten files are also updated in
+the building cache and placeholder manifest, so those generators do not
+treat them as modified.
+
+Usage:
+  python optimize_pngs.py
+  python optimize_pngs.py Mods/jurassica/Content/sprites/creatures
+  python optimize_pngs.py --jobs 4
+  python optimize_pngs.py --dry-run
+  python optimize_pngs.py --force
+
+Requirements: pip install Pillow numpy
+"""
+
+import argparse
+import io
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+import output_files
+from generate_placeholders import CONTENT, MANIFEST_PATH as PLACEHOLDER_MANIFEST_PATH
+from process_building_art import BASE, CACHE_PATH as BUILD_CACHE_PATH
+
+MODS_DIR = os.path.join(BASE, "Mods")
+CACHE_PATH = os.path.join(BASE, ".png_optimize_cache.json")
+
+# Bump when the encoder choices change, to re-examine every file
+CACHE_VERSION = 2
+
+# zlib strategies tried for every candidate: default, filtered, RLE
+ZLIB_STRATEGIES = (0, 1, 3)
+
+# Modes whose pixels round-trip exactly through RGBA; palette images are
+# skipped because the engine reads their indices, not just their colors
+SUPPORTED_MODES = ("1", "L", "LA", "RGB", "RGBA")
+
+
+def candidate_images(rgba):
+    """Every exact re-encoding of an RGBA array worth trying, smallest modes first."""
+    rgb, alpha = rgba[..., :3], rgba[..., 3]
+    opaque = bool((alpha == 255).all())
+    gray = bool(((rgb[..., 0] == rgb[..., 1]) & (rgb[..., 1] == rgb[..., 2])).all())
+
+    candidates = []
+    if gray:
+        candidates.append(Image.fromarray(np.ascontiguousarray(rgba[..., 0]) if opaque
+                                          else np.ascontiguousarray(rgba[..., [0, 3]])))
+    candidates.append(Image.fromarray(np.ascontiguousarray(rgb) if opaque else rgba))
+    return candidates
+
+
+def _encode(img, strategy):
+    buf = io.BytesIO()
+    img.save(buf, "PNG", compress_level=9, compress_type=strategy)
+    return buf.getvalue()
+
+
+def optimize_png(path, dry_run=False):
+    """Re-encode one PNG in place if a smaller exact encoding exists.
+
+    Returns (bytes before, bytes after, chosen mode or a reason it was left
+    alone). The file is written via a temp file + rename.
+    """
+    with open(path, "rb") as f:
+        original = f.read()
+
+    try:
+        with Image.open(io.BytesIO(original)) as img:
+            if img.mode not in SUPPORTED_MODES or getattr(img, "n_frames", 1) > 1:
+                return len(original), len(original), f"skipped ({img.mode})"
+            rgba = np.array(img.convert("RGBA"))
+    except Exception as e:
+        return len(original), len(original), f"unreadable ({e})"
+
+    best, best_mode = original, None
+    for candidate in candidate_images(rgba):
+        for strategy in ZLIB_STRATEGIES:
+            data = _encode(candidate, strategy)
+            if len(data) < len(best):
+                best, best_mode = data, candidate.mode
+
+    if best_mode is None:
+        return len(original), len(original), "already optimal"
+
+    # Never trust an encoding we have not decoded again
+    with Image.open(io.BytesIO(best)) as check:
+        if not np.array_equal(np.array(check.convert("RGBA")), rgba):
+            return len(original), len(original), "skipped (round-trip mismatch)"
+
+    if not dry_run:
+        output_files.write_bytes(path, best)
+    return len(original), len(best), best_mode
+
+
+def _optimize_job(job):
+    path, dry_run = job
+    return optimize_png(path, dry_run)
+
+
+def load_cache():
+    """Load the optimizer manifest, or an empty one if missing/stale/corrupt."""
+    try:
+        with open(CACHE_PATH, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {"version": CACHE_VERSION, "files": {}}
+    if cache.get("version") != CACHE_VERSION:
+        return {"version": CACHE_VERSION, "files": {}}
+    return cache
+
+
+def find_pngs(roots):
+    """Sorted paths of every .png under the given directories."""
+    paths = []
+    for root in roots:
+        for dirpath, _, filenames in os.walk(root):
+            paths.extend(os.path.join(dirpath, name) for name in filenames
+                         if name.lower().endswith(".png"))
+    return sorted(paths)
+
+
+def _refresh_manifest(manifest_path, section, root, restat):
+    """Point a generator's manifest at files this run rewrote.
+
+    The manifest's `section` maps keys to entries whose "outputs" map paths
+    relative to root -> stat. restat maps paths relative to BASE -> (stat
+    before, stat after). Only outputs still recorded with the old stat are
+    updated, so optimizing does not make them look modified (and get
+    regenerated, unoptimized) on the generator's next run.
+    """
+    try:
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return
+
+    changed = False
+    for entry in manifest.get(section, {}).values():
+        outputs = entry.get("outputs", {})
+        for rel_path, stat in outputs.items():
+            base_rel = os.path.relpath(os.path.join(root, rel_path), BASE)
+            if base_rel in restat and stat == restat[base_rel][0]:
+                outputs[rel_path] = restat[base_rel][1]
+                changed = True
+    if changed:
+        output_files.write_json(manifest_path, manifest, count=False,
+                                indent=2, sort_keys=True)
+
+
+def optimize_tree(roots, jobs=1, force=False, dry_run=False):
+    """Optimize every PNG under roots, skipping files unchanged since the last run."""
+    cache = load_cache()
+    files = cache["files"]
+    start = time.perf_counter()
+
+    stale = []
+    unchanged = 0
+    for path in find_pngs(roots):
+        rel_path = os.path.relpath(path, BASE)
+        entry = files.get(rel_path)
+        stat = output_files.file_stat(path)
+        if not force and entry:
+            if entry["stat"] == stat:
+                unchanged += 1
+                continue
+            digest = output_files.file_digest(path)
+            if entry["hash"] == digest:
+                # Touched but not modified
+                entry["stat"] = stat
+                unchanged += 1
+                continue
+        stale.append((path, rel_path, stat))
+
+    print(f"PNG optimizer: {len(stale)} to check, {unchanged} unchanged since last run")
+
+    jobs = min(jobs, len(stale))
+    job_args = [(path, dry_run) for path, _, _ in stale]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            results = list(executor.map(_optimize_job, job_args, chunksize=8))
+    else:
+        results = [_optimize_job(job) for job in job_args]
+
+    total_before = total_after = rewritten = 0
+    restat = {}
+    for (path, rel_path, old_stat), (before, after, outcome) in zip(stale, results):
+        total_before += before
+        total_after += after
+        if after < before:
+            rewritten += 1
+            print(f"  {rel_path}: {before / 1024:.1f} KB -> {after / 1024:.1f} KB ({outcome})")
+        elif outcome.startswith(("skipped", "unreadable")):
+            print(f"  {rel_path}: {outcome}")
+
+        if dry_run:
+            continue
+        new_stat = output_files.file_stat(path)
+        if new_stat != old_stat:
+            restat[rel_path] = (old_stat, new_stat)
+        files[rel_path] = {"stat": new_stat, "hash": output_files.file_digest(path)}
+
+    if not dry_run:
+        output_files.write_json(CACHE_PATH, cache, count=False, indent=2, sort_keys=True)
+        if restat:
+            _refresh_manifest(BUILD_CACHE_PATH, "buildings", BASE, restat)
+            _refresh_manifest(PLACEHOLDER_MANIFEST_PATH, "units", CONTENT, restat)
+
+    saved = total_before - total_after
+    share = saved / total_before if total_before else 0.0
+    verb = "Would rewrite" if dry_run else "Rewrote"
+    print(f"\n{verb} {rewritten} of {len(stale)} file(s), saving {saved / 1024:.1f} KB "
+          f"({share:.1%} of checked) in {time.perf_counter() - start:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Losslessly shrink the PNGs in the Jurassica mod tree",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                                 Optimize everything under Mods/
+  %(prog)s Mods/jurassica/Content/sprites  Optimize one subtree
+  %(prog)s --jobs 4                        Use 4 worker processes
+  %(prog)s --dry-run                       Report savings without writing
+  %(prog)s --force                         Re-examine files unchanged since last run
+        """,
+    )
+    parser.add_argument("dirs", nargs="*", default=[MODS_DIR],
+                        help="Directories to scan (default: Mods/)")
+    parser.add_argument("--jobs", type=int, default=0, metavar="N",
+                        help="Worker processes (default 0 = one per CPU)")
+    parser.add_argument("--force", action="store_true",
+                        help="Ignore the manifest and check every file")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report what would be saved without writing anything")
+
+    args = parser.parse_args()
+
+    if args.jobs < 1:
+        args.jobs = os.cpu_count() or 1
+
+    optimize_tree(args.dirs, args.jobs, args.force, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
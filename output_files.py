@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Write-if-changed output helpers shared by the Jurassica asset scripts.
+
+Every output is serialized to memory first and compared with the file
+already on disk (size, then SHA-256 of the contents). Only a real difference
+is written, via a temp file + rename, so regenerating unchanged assets
+leaves their mtimes alone and readers never see a partial file.
+
+Each process keeps running totals in `stats`; scripts that fan work out to
+worker processes send the workers' totals back and add them up. Caches and
+manifests are written with count=False so they stay out of those totals.
+
+file_stat() and file_digest() are the size/mtime and content fingerprints
+the build caches and manifests record.
+
+Requirements: pip install Pillow
+"""
+
+import hashlib
+import io
+import json
+import os
+
+
+class OutputStats:
+    """Counts of outputs written vs. left unchanged."""
+
+    def __init__(self, written=0, unchanged=0):
+        self.written = written
+        self.unchanged = unchanged
+
+    def add(self, other):
+        self.written += other.written
+        self.unchanged += other.unchanged
+
+    def summary(self):
+        return f"{self.written} written, {self.unchanged} unchanged"
+
+
+# Totals for this process
+stats = OutputStats()
+
+
+def reset_stats():
+    """Start new totals; returns the previous ones."""
+    global stats
+    previous, stats = stats, OutputStats()
+    return previous
+
+
+def file_stat(path):
+    """[size, mtime_ns] of a file, as recorded in the caches and manifests."""
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+def file_digest(path):
+    """SHA-256 hex digest of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def same_contents(path, data):
+    """True if the file at path holds exactly data."""
+    try:
+        if os.path.getsize(path) != len(data):
+            return False
+        with open(path, 'rb') as f:
+            existing = f.read()
+    except OSError:
+        return False
+    return hashlib.sha256(existing).digest() == hashlib.sha256(data).digest()
+
+
+def write_bytes(path, data, count=True):
+    """Write data to path unless the file already holds exactly that.
+
+    Returns True if the file was written. With count=False the write is not
+    added to `stats`.
+    """
+    if same_contents(path, data):
+        if count:
+            stats.unchanged += 1
+        return False
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    if count:
+        stats.written += 1
+    return True
+
+
+def png_bytes(img, **save_kwargs):
+    """img encoded as PNG, in memory."""
+    buf = io.BytesIO()
+    img.save(buf, "PNG", **save_kwargs)
+    return buf.getvalue()
+
+
+def save_png(img, path, **save_kwargs):
+    """img.save(path) as PNG, skipped if the encoded bytes are already on disk."""
+    return write_bytes(path, png_bytes(img, **save_kwargs))
+
+
+def write_json(path, data, count=True, **dump_kwargs):
+    """json.dump(data) to path, skipped if the serialized text is already on disk."""
+    return write_bytes(path, json.dumps(data, **dump_kwargs).encode(), count)
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Pack Jurassica sprite frames into atlas sheets (experimental).
+
+For every creature, the battle animation frames that exist on disk (as
+compiled by generate_animation_jsons --from-disk) are shelf-packed into one
+<name>Atlas.png, and <name>Atlas.json describes the same sequences with a
+rectangle into the sheet for every frame instead of a file name. Frames
+shared by several groups (death, turn left/right) are stored once.
+
+With --buildings, the building sprites and their area/border masks are
+packed into buildings/buildingsAtlas.png with a name -> rectangle map.
+
+EXPERIMENTAL: the <name>Atlas.json layout is this script's own; neither
+VCMI nor any other script here reads it, so packing does not yet reduce the
+files the game loads. Atlases are written under atlases/ (mirroring the
+Content paths) instead of into the shipped Mods/ tree, and this script is
+not part of the asset pipeline.
+
+Frame sizes come from PNG headers, so a sheet is laid out before anything is
+decoded. Outputs go through the write-if-changed layer, so re-packing
+unchanged frames touches no files.
+
+Usage:
+  python pack_atlases.py
+  python pack_atlases.py --creature trex,giganotosaurus
+  python pack_atlases.py --buildings
+
+Requirements: pip install Pillow
+"""
+
+import argparse
+import math
+import os
+import sys
+import time
+
+from PIL import Image
+
+import output_files
+from generate_animation_jsons import (
+    BASE, BUILDINGS, CONTENT, CREATURES, SpriteIndex, generate_battle_animation,
+)
+
+ATLAS_DIR = os.path.join(BASE, "atlases")
+
+# Transparent gap between packed frames, so filtering never bleeds neighbors
+ATLAS_PADDING = 1
+
+BUILDINGS_BASEPATH = "sprites/towns/jurassica/buildings/"
+BUILDING_LAYERS = ("", "_area", "_border")
+
+
+def shelf_pack(sizes, padding=ATLAS_PADDING):
+    """Lay out (w, h) rectangles on shelves in a roughly square sheet.
+
+    Rectangles are placed tallest first, left to right, starting a new shelf
+    when the next one does not fit the sheet width (the square root of the
+    total padded area, or the widest rectangle). Returns (sheet_w, sheet_h,
+    positions) with positions[i] the top-left of sizes[i].
+    """
+    if not sizes:
+        return 0, 0, []
+
+    area = sum((w + padding) * (h + padding) for w, h in sizes)
+    width = max(max(w for w, _ in sizes), math.ceil(math.sqrt(area)))
+
+    positions = [None] * len(sizes)
+    x = y = shelf_h = 0
+    for i in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0])):
+        w, h = sizes[i]
+        if x and x + w > width:
+            x, y, shelf_h = 0, y + shelf_h + padding, 0
+        positions[i] = (x, y)
+        x += w + padding
+        shelf_h = max(shelf_h, h)
+
+    sheet_w = max(px + w for (px, _), (w, _) in zip(positions, sizes))
+    sheet_h = max(py + h for (_, py), (_, h) in zip(positions, sizes))
+    return sheet_w, sheet_h, positions
+
+
+def build_atlas(index, basepath, filenames):
+    """Pack the named frames under basepath into one sheet.
+
+    Returns (sheet, rects) with rects mapping filename -> {"x", "y", "w", "h"}.
+    Frames whose header could not be read are skipped and reported.
+    """
+    files = index.files(basepath)
+    names = []
+    for name in filenames:
+        if files.get(name) is None:
+            index.problems.append(f"{basepath}{name}: not a readable PNG, left out of atlas")
+        else:
+            names.append(name)
+
+    sizes = [files[name] for name in names]
+    sheet_w, sheet_h, positions = shelf_pack(sizes)
+    sheet = Image.new("RGBA", (max(1, sheet_w), max(1, sheet_h)), (0, 0, 0, 0))
+
+    rects = {}
+    for name, (w, h), (x, y) in zip(names, sizes, positions):
+        with Image.open(os.path.join(index.content_dir, basepath, name)) as frame:
+            sheet.paste(frame.convert("RGBA"), (x, y))
+        rects[name] = {"x": x, "y": y, "w": w, "h": h}
+    return sheet, rects
+
+
+def pack_creature(index, name):
+    """Pack one creature's battle frames; returns (sheet, descriptor, frame count)."""
+    anim = generate_battle_animation(name, index)
+    basepath = anim["basepath"]
+    filenames = list(dict.fromkeys(frame for seq in anim["sequences"] for frame in seq["frames"]))
+    sheet, rects = build_atlas(index, basepath, filenames)
+
+    sequences = []
+    for seq in anim["sequences"]:
+        frames = [rects[frame] for frame in seq["frames"] if frame in rects]
+        if frames:
+            sequences.append(dict(seq, frames=frames))
+
+    descriptor = {
+        "basepath": basepath,
+        "atlas": f"{name}Atlas.png",
+        "size": [sheet.width, sheet.height],
+        "sequences": sequences,
+    }
+    return sheet, descriptor, len(rects)
+
+
+def pack_buildings(index):
+    """Pack every building sprite and mask; returns (sheet, descriptor, frame count)."""
+    filenames = [f"{key}{layer}.png" for key in BUILDINGS for layer in BUILDING_LAYERS
+                 if index.has(BUILDINGS_BASEPATH, f"{key}{layer}.png")]
+    sheet, rects = build_atlas(index, BUILDINGS_BASEPATH, filenames)
+    descriptor = {
+        "basepath": BUILDINGS_BASEPATH,
+        "atlas": "buildingsAtlas.png",
+        "size": [sheet.width, sheet.height],
+        "frames": rects,
+    }
+    return sheet, descriptor, len(rects)
+
+
+def _write_atlas(basepath, stem, sheet, descriptor):
+    directory = os.path.join(ATLAS_DIR, basepath)
+    os.makedirs(directory, exist_ok=True)
+    output_files.save_png(sheet, os.path.join(directory, f"{stem}.png"))
+    output_files.write_json(os.path.join(directory, f"{stem}.json"), descriptor, indent='\t')
+    return os.path.getsize(os.path.join(directory, f"{stem}.png"))
+
+
+def pack_all(creatures=CREATURES, buildings=False):
+    """Pack the given creatures (and optionally the buildings); returns problems found."""
+    start = time.perf_counter()
+    index = SpriteIndex(CONTENT)
+    output_files.reset_stats()
+    packed_frames = 0
+
+    print("Packing sprite atlases...")
+    for name in creatures:
+        sheet, descriptor, count = pack_creature(index, name)
+        if not count:
+            index.problems.append(f"{name}: no battle frames on disk, atlas not written")
+            continue
+        size = _write_atlas(descriptor["basepath"], f"{name}Atlas", sheet, descriptor)
+        packed_frames += count
+        print(f"  {name}: {count} frames -> {name}Atlas.png "
+              f"{sheet.width}x{sheet.height} ({size / 1024:.0f} KB)")
+
+    if buildings:
+        sheet, descriptor, count = pack_buildings(index)
+        if count:
+            size = _write_atlas(BUILDINGS_BASEPATH, "buildingsAtlas", sheet, descriptor)
+            packed_frames += count
+            print(f"  buildings: {count} sprites + masks -> buildingsAtlas.png "
+                  f"{sheet.width}x{sheet.height} ({size / 1024:.0f} KB)")
+        else:
+            index.problems.append("buildings: no sprites on disk, atlas not written")
+
+    print(f"\nPacked {packed_frames} frames into atlases/ in {time.perf_counter() - start:.2f}s "
+          f"(files: {output_files.stats.summary()})")
+    if index.problems:
+        print(f"\n{len(index.problems)} problem(s) found on disk:")
+        for problem in index.problems:
+            print(f"  {problem}")
+    return index.problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Pack Jurassica sprite frames into atlas sheets (experimental; "
+                    "nothing reads the atlases yet)",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                              Pack every creature's battle frames
+  %(prog)s --creature trex              Pack one creature
+  %(prog)s --buildings                  Also pack building sprites and masks
+        """,
+    )
+    parser.add_argument("--creature", metavar="NAMES",
+                        help="Comma-separated creatures to pack (default: all)")
+    parser.add_argument("--buildings", action="store_true",
+                        help="Also pack building sprites and area/border masks")
+    parser.add_argument("--strict", action="store_true",
+                        help="Exit 1 if any problems were found")
+
+    args = parser.parse_args()
+
+    creatures = CREATURES
+    if args.creature:
+        creatures = args.creature.split(",")
+        unknown = set(creatures) - set(CREATURES)
+        if unknown:
+            parser.error(f"unknown creature(s): {', '.join(sorted(unknown))}")
+
+    problems = pack_all(creatures, args.buildings)
+    if args.strict and problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,36 +2,85 @@
 """
 Process AI-generated building art for the Jurassica VCMI mod.
 
-Takes raw AI-generated building images and produces all VCMI-ready files:
+Takes raw AI-generated building images (PNG, JPEG or WebP) and produces all
+VCMI-ready files:
   - Building sprite PNG (resized, background removed)
   - Area mask (white where clickable)
   - Border mask (gold hover outline)
   - 44x44 hall icon
   - Preview composite over town background
 
+Sprite, masks and icon are written at 1x under sprites/ and at 2x under
+Sprites2x/ from a single decode and background removal; the 1x sprite is
+downscaled from the 2x one.
+
 Usage:
   python process_building_art.py <building_key> <input_image.png>
   python process_building_art.py --batch raw/
+  python process_building_art.py --batch raw/ --jobs 16
+  python process_building_art.py --batch raw/ --force
+  python process_building_art.py --batch raw/ --town-preview
+  python process_building_art.py --batch raw/ --profile previews/profile.csv
+  python process_building_art.py --watch raw/
+  python process_building_art.py --batch raw/ --bg-mode flood --bg-falloff 2
+  python process_building_art.py --batch raw/ --trim --update-config
   python process_building_art.py --show-prompt dwelling7
   python process_building_art.py --show-prompt --all
   python process_building_art.py dwelling7 raw/dwelling7.png --update-config
+  python process_building_art.py --batch raw/ --update-config --dry-run
 
-Requirements: pip install Pillow
+Requirements: pip install Pillow numpy
 """
 
 import argparse
+import collections
+import contextlib
+import csv
+import functools
+import hashlib
+import io
 import json
 import os
 import sys
-from PIL import Image, ImageDraw, ImageFilter, ImageFont
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+import output_files
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 
 BASE = os.path.dirname(os.path.abspath(__file__))
 CONTENT = os.path.join(BASE, "Mods", "jurassica", "Content")
 BUILDINGS_DIR = os.path.join(CONTENT, "sprites", "towns", "jurassica", "buildings")
+BUILDINGS_2X_DIR = os.path.join(CONTENT, "Sprites2x", "towns", "jurassica", "buildings")
+# Resolution of the Sprites2x outputs relative to the 1x targets
+SCALE_2X = 2
 TOWN_BG_PATH = os.path.join(CONTENT, "sprites", "towns", "jurassica", "townBackground.png")
 CONFIG_PATH = os.path.join(CONTENT, "config", "jurassica.json")
 PREVIEWS_DIR = os.path.join(BASE, "previews")
 RAW_DIR = os.path.join(BASE, "raw")
+CACHE_PATH = os.path.join(BASE, ".building_art_cache.json")
+
+# Bump when a pipeline change alters outputs, to invalidate the build cache
+CACHE_VERSION = 5
+
+# Raw input formats accepted by --batch
+RAW_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+# --watch: seconds between scans of the raw directory, and how long a file
+# must stay unchanged (size + mtime) before it is treated as fully written
+WATCH_POLL_INTERVAL = 0.25
+WATCH_SETTLE_TIME = 0.5
+
+# Oversized raw art is decoded down to about this multiple of the largest
+# (2x) target size before any per-pixel work, leaving headroom for the
+# LANCZOS downscale
+RAW_DECODE_SCALE = 2
 
 # Original placeholder size (all buildings were 100x80)
 ORIG_W, ORIG_H = 100, 80
@@ -119,6 +168,13 @@ BUILDING_POSITIONS = {
     "grail":         (350, 200),
 }
 
+# Buildings that replace each other on the town screen, lowest tier first
+BUILD_TIERS = [
+    ["villageHall", "townHall", "cityHall", "capitol"],
+    ["fort", "citadel", "castle"],
+    ["mageGuild1", "mageGuild2", "mageGuild3", "mageGuild4"],
+] + [[f"dwelling{i}", f"upgDwelling{i}"] for i in range(1, 8)]
+
 # Building names (for prompt generation)
 BUILDING_NAMES = {
     "villageHall":   "Village Hall",
@@ -388,65 +444,179 @@ CHROMA_KEYS = [
 # Gold border color for hover outline
 BORDER_COLOR = (255, 223, 127, 255)  # #FFDF7F
 
+# Mask tuning: alpha threshold for "solid" pixels and square morphology
+# window sizes (odd, same meaning as ImageFilter.MaxFilter/MinFilter sizes)
+MASK_ALPHA_THRESHOLD = 64
+AREA_CLOSE_SIZE = 9      # Dilate to merge nearby regions and close gaps
+AREA_ERODE_SIZE = 5      # Erode back to roughly the original shape
+AREA_PAD_SIZE = 9        # Final dilation for a generous click target
+BORDER_OUTER_SIZE = 5    # Outer edge of the hover outline
+BORDER_INNER_SIZE = 3    # Inner edge of the hover outline
+
+# Background removal modes: "global" clears every pixel matching the key
+# color anywhere; "flood" only clears matching pixels connected to the border
+BACKGROUND_MODES = ("global", "flood")
+
+# Per-run settings that change the generated images (threaded through the
+# pipeline and into the build cache)
+BuildOptions = collections.namedtuple("BuildOptions", ["bg_mode", "bg_falloff", "trim"],
+                                      defaults=["global", 0, False])
+
+
+def load_raw_image(input_path, target_w, target_h):
+    """Open raw art, decoded at reduced resolution if it is much larger than needed.
+
+    JPEGs are decoded directly at 1/2, 1/4 or 1/8 scale via draft(); other
+    formats are box-reduced by an integer factor right after decoding. The
+    result stays at least RAW_DECODE_SCALE times the 2x target size, so
+    background removal and masking cost is bounded by the target, not the
+    input. The file is opened once; returns (image, raw size, raw mode).
+    """
+    img = Image.open(input_path)
+    raw_size, raw_mode = img.size, img.mode
+    limit_w = target_w * SCALE_2X * RAW_DECODE_SCALE
+    limit_h = target_h * SCALE_2X * RAW_DECODE_SCALE
+    img.draft(img.mode, (limit_w, limit_h))
+
+    factor = min(img.width // limit_w, img.height // limit_h)
+    if factor > 1:
+        if img.mode not in ("L", "LA", "RGB", "RGBA"):
+            img = img.convert("RGBA")
+        img = img.reduce(factor)
+    else:
+        img.load()
+    return img, raw_size, raw_mode
+
+
+def _transparent_fraction(alpha):
+    """Fraction of a ~20x20 sample grid of the alpha array that is below 128."""
+    h, w = alpha.shape
+    grid = alpha[::max(1, h // 20), ::max(1, w // 20)]
+    return np.count_nonzero(grid < 128) / grid.size
+
+
+def _edge_connected(candidates):
+    """Boolean mask of the candidate pixels 4-connected to the image border.
+
+    Candidate pixels are split into horizontal runs, runs that overlap in
+    adjacent rows are linked, and the links are merged with a vectorized
+    union-find (hooking to the smaller root plus pointer jumping). Work is
+    per run rather than per pixel and there is no Python recursion.
+    """
+    h, w = candidates.shape
+    stride = w + 1
+    padded = np.zeros((h, w + 2), dtype=np.int8)
+    padded[:, 1:-1] = candidates
+    steps = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(steps == 1)
+    _, ends = np.nonzero(steps == -1)  # Exclusive; same order as starts
+    n = len(rows)
+    if n == 0:
+        return np.zeros((h, w), dtype=bool)
+
+    # Runs in the next row that overlap each run form a contiguous index range
+    start_keys = rows * stride + starts
+    end_keys = rows * stride + ends
+    next_row = (rows + 1) * stride
+    lo = np.searchsorted(end_keys, next_row + starts, side="right")
+    hi = np.searchsorted(start_keys, next_row + ends, side="left")
+    counts = np.maximum(hi - lo, 0)
+    a = np.repeat(np.arange(n), counts)
+    b = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+
+    parent = np.arange(n)
+    while True:
+        root_a, root_b = parent[a], parent[b]
+        if np.array_equal(root_a, root_b):
+            break
+        np.minimum.at(parent, np.maximum(root_a, root_b), np.minimum(root_a, root_b))
+        while True:
+            grand = parent[parent]
+            if np.array_equal(grand, parent):
+                break
+            parent = grand
+
+    touches_border = (rows == 0) | (rows == h - 1) | (starts == 0) | (ends == w)
+    border_roots = np.zeros(n, dtype=bool)
+    border_roots[parent[touches_border]] = True
+    keep = border_roots[parent]
+
+    # Paint the selected runs back as +1/-1 marks and a per-row cumulative sum
+    marks = np.zeros(h * stride, dtype=np.int8)
+    marks[start_keys[keep]] = 1
+    marks[end_keys[keep]] = -1
+    return np.cumsum(marks.reshape(h, stride), axis=1)[:, :w] > 0
+
+
+def _feather(alpha, removed, falloff):
+    """Ramp alpha up over `falloff` pixels next to removed background."""
+    inside = removed
+    for step in range(1, falloff + 1):
+        ring = _dilate(removed, 2 * step + 1) & ~inside
+        alpha[ring] = alpha[ring].astype(np.uint16) * step // (falloff + 1)
+        inside = inside | ring
+
+
+def remove_background(img, mode="global", falloff=0):
+    """Remove green/magenta background via chroma keying, or use existing alpha.
+
+    With mode "flood", only key-colored pixels connected to the image border
+    are removed, so interior details in the key color (ferns, white
+    highlights) survive. falloff > 0 feathers alpha over that many pixels
+    next to the removed background.
+    """
+    if mode not in BACKGROUND_MODES:
+        raise ValueError(f"Unknown background mode '{mode}'")
 
-def remove_background(img):
-    """Remove green/magenta background via chroma keying, or use existing alpha."""
     img = img.convert("RGBA")
-    pixels = img.load()
-    w, h = img.size
+    arr = np.array(img)
+    h, w = arr.shape[:2]
+    alpha = arr[:, :, 3]
 
     # Check if image already has meaningful transparency
-    alpha_values = [pixels[x, y][3] for x in range(0, w, max(1, w // 20))
-                    for y in range(0, h, max(1, h // 20))]
-    transparent_pct = sum(1 for a in alpha_values if a < 128) / len(alpha_values)
-    if transparent_pct > 0.1:
+    if _transparent_fraction(alpha) > 0.1:
         # Already has transparency, skip chroma keying
         return img
 
-    # Try chroma key removal for each key color
-    for key_color, tolerance in CHROMA_KEYS:
-        kr, kg, kb = key_color
-        for y in range(h):
-            for x in range(w):
-                r, g, b, a = pixels[x, y]
-                dist = ((r - kr) ** 2 + (g - kg) ** 2 + (b - kb) ** 2) ** 0.5
-                if dist < tolerance:
-                    pixels[x, y] = (r, g, b, 0)
+    rgb = arr[:, :, :3].astype(np.int32)
 
-    # Check if chroma keying did anything
-    alpha_after = [pixels[x, y][3] for x in range(0, w, max(1, w // 20))
-                   for y in range(0, h, max(1, h // 20))]
-    transparent_after = sum(1 for a in alpha_after if a < 128) / len(alpha_after)
-    if transparent_after > 0.1:
-        return img
+    # Chroma key removal: squared distance to every key color in one pass,
+    # expanded as |p|^2 - 2 p.k + |k|^2 so the (h, w, keys) result stays small
+    keys = np.array([k for k, _ in CHROMA_KEYS], dtype=np.int32)
+    tolerances = np.array([t for _, t in CHROMA_KEYS], dtype=np.int32)
+    dist_sq = ((rgb * rgb).sum(axis=2)[:, :, None] - 2 * (rgb @ keys.T)
+               + (keys * keys).sum(axis=1))
+    removed = (dist_sq < tolerances * tolerances).any(axis=2)
+    if mode == "flood":
+        removed = _edge_connected(removed)
+    alpha[removed] = 0
 
-    # Fallback: threshold-based removal on corner-sampled background color
-    # Sample corners to detect background
-    corners = []
-    sample = 5
-    for cx, cy in [(0, 0), (w - 1, 0), (0, h - 1), (w - 1, h - 1)]:
-        for dx in range(sample):
-            for dy in range(sample):
-                sx = min(max(cx + dx - sample // 2, 0), w - 1)
-                sy = min(max(cy + dy - sample // 2, 0), h - 1)
-                corners.append(pixels[sx, sy][:3])
-
-    if corners:
-        avg_r = sum(c[0] for c in corners) // len(corners)
-        avg_g = sum(c[1] for c in corners) // len(corners)
-        avg_b = sum(c[2] for c in corners) // len(corners)
-        bg_color = (avg_r, avg_g, avg_b)
+    # Check if chroma keying did anything
+    if _transparent_fraction(alpha) <= 0.1:
+        # Fallback: threshold-based removal on corner-sampled background color
+        # Sample 5x5 patches (clamped to the image) around each corner
+        sample = 5
+        offsets = np.arange(sample) - sample // 2
+        corners = []
+        for cx, cy in [(0, 0), (w - 1, 0), (0, h - 1), (w - 1, h - 1)]:
+            xs = np.clip(cx + offsets, 0, w - 1)
+            ys = np.clip(cy + offsets, 0, h - 1)
+            corners.append(rgb[np.ix_(ys, xs)].reshape(-1, 3))
+        corners = np.concatenate(corners)
+
+        bg_color = corners.sum(axis=0) // len(corners)
         tolerance = 60
+        diff = rgb - bg_color
+        matched = (diff * diff).sum(axis=2) < tolerance * tolerance
+        if mode == "flood":
+            matched = _edge_connected(matched | removed)
+        removed |= matched
+        alpha[matched] = 0
 
-        for y in range(h):
-            for x in range(w):
-                r, g, b, a = pixels[x, y]
-                dist = ((r - bg_color[0]) ** 2 + (g - bg_color[1]) ** 2 +
-                        (b - bg_color[2]) ** 2) ** 0.5
-                if dist < tolerance:
-                    pixels[x, y] = (r, g, b, 0)
+    if falloff > 0:
+        _feather(alpha, removed, falloff)
 
-    return img
+    return Image.fromarray(arr)
 
 
 def resize_building(img, target_w, target_h):
@@ -474,37 +644,70 @@ def resize_building(img, target_w, target_h):
     return canvas
 
 
-def generate_area_mask(img):
-    """Generate area mask from alpha channel.
+def _binary_alpha(img):
+    """Boolean array, True where the alpha channel is solid enough to count."""
+    return np.array(img.getchannel("A")) > MASK_ALPHA_THRESHOLD
 
-    White (255) where opaque (clickable), black (0) where transparent.
-    Heavily dilated and hole-filled for a generous, solid click target.
+
+def _dilate(mask, size):
+    """Binary dilation with a size x size square window.
+
+    Separable running-window counts (cumulative sums along each axis), so the
+    cost per pixel does not depend on the window size. Matches MaxFilter(size)
+    on a 0/255 image, including its edge handling.
     """
-    alpha = img.split()[3]  # Get alpha channel
+    r = size // 2
+    for axis in (0, 1):
+        pad = [(0, 0), (0, 0)]
+        pad[axis] = (r + 1, r)
+        counts = np.cumsum(np.pad(mask, pad).astype(np.int32), axis=axis)
+        upper = counts.take(range(size, counts.shape[axis]), axis=axis)
+        lower = counts.take(range(0, counts.shape[axis] - size), axis=axis)
+        mask = (upper - lower) > 0
+    return mask
 
-    # Threshold: opaque enough = clickable
-    area = alpha.point(lambda p: 255 if p > 64 else 0)
 
-    # Aggressively dilate to merge nearby regions and close gaps
-    area = area.filter(ImageFilter.MaxFilter(9))
+def _erode(mask, size):
+    """Binary erosion with a size x size square window (matches MinFilter)."""
+    return ~_dilate(~mask, size)
 
-    # Erode back slightly to keep roughly the original shape but with holes filled
-    area = area.filter(ImageFilter.MinFilter(5))
 
-    # Final dilation for generous click target (4px padding)
-    area = area.filter(ImageFilter.MaxFilter(9))
+def _rgba_mask(mask, color):
+    """Paint `color` where `mask` is True on an otherwise transparent RGBA image."""
+    out = np.zeros(mask.shape + (4,), dtype=np.uint8)
+    out[mask] = color
+    return Image.fromarray(out)
 
-    # Convert to RGBA (VCMI expects RGBA masks)
-    mask = Image.new("RGBA", img.size, (0, 0, 0, 0))
-    pixels = mask.load()
-    area_pixels = area.load()
-    w, h = img.size
-    for y in range(h):
-        for x in range(w):
-            if area_pixels[x, y] > 128:
-                pixels[x, y] = (255, 255, 255, 255)
 
-    return mask
+def _scaled_window(size, scale):
+    """Window size with the same radius in pixels of a `scale`x image."""
+    return (size - 1) * scale + 1
+
+
+def _area_from_binary(binary, scale=1):
+    # Aggressively dilate to merge nearby regions and close gaps, erode back
+    # slightly to keep roughly the original shape but with holes filled, then
+    # dilate again for a generous click target
+    area = _dilate(binary, _scaled_window(AREA_CLOSE_SIZE, scale))
+    area = _erode(area, _scaled_window(AREA_ERODE_SIZE, scale))
+    area = _dilate(area, _scaled_window(AREA_PAD_SIZE, scale))
+    return _rgba_mask(area, (255, 255, 255, 255))
+
+
+def _border_from_binary(binary, scale=1):
+    # Edge = dilated - eroded
+    edge = (_dilate(binary, _scaled_window(BORDER_OUTER_SIZE, scale))
+            & ~_erode(binary, _scaled_window(BORDER_INNER_SIZE, scale)))
+    return _rgba_mask(edge, BORDER_COLOR)
+
+
+def generate_area_mask(img):
+    """Generate area mask from alpha channel.
+
+    White (255) where opaque (clickable), black (0) where transparent.
+    Heavily dilated and hole-filled for a generous, solid click target.
+    """
+    return _area_from_binary(_binary_alpha(img))
 
 
 def generate_border_mask(img):
@@ -513,28 +716,17 @@ def generate_border_mask(img):
     Creates a gold (#FFDF7F) outline that follows the shape of the building,
     shown on hover in the town screen.
     """
-    alpha = img.split()[3]
+    return _border_from_binary(_binary_alpha(img))
 
-    # Create binary mask from alpha
-    binary = alpha.point(lambda p: 255 if p > 64 else 0)
 
-    # Erode and dilate to find edge
-    dilated = binary.filter(ImageFilter.MaxFilter(5))
-    eroded = binary.filter(ImageFilter.MinFilter(3))
+def generate_masks(img, scale=1):
+    """Generate (area, border) masks from one shared thresholded alpha.
 
-    # Edge = dilated - eroded
-    border = Image.new("RGBA", img.size, (0, 0, 0, 0))
-    pixels = border.load()
-    dil_pixels = dilated.load()
-    ero_pixels = eroded.load()
-    w, h = img.size
-
-    for y in range(h):
-        for x in range(w):
-            if dil_pixels[x, y] > 128 and ero_pixels[x, y] < 128:
-                pixels[x, y] = BORDER_COLOR
-
-    return border
+    For a `scale`x sprite the morphology windows are scaled to match, so the
+    click area and outline cover the same screen region at every scale.
+    """
+    binary = _binary_alpha(img)
+    return _area_from_binary(binary, scale), _border_from_binary(binary, scale)
 
 
 def generate_icon(img, size=44):
@@ -564,18 +756,41 @@ def generate_icon(img, size=44):
     return icon
 
 
-def compute_adjusted_position(building_key):
+def trim_building(images, images_2x):
+    """Crop 1x and 2x sprite/masks to the bounding box of anything visible in them.
+
+    images and images_2x are (img, area, border) tuples. Every image is
+    cropped to one box, taken in 1x pixels and doubled for the 2x set, so
+    they stay aligned in VCMI at both scales. Returns (images, images_2x,
+    (left, top)); the offset is where the crop sat in the full 1x canvas and
+    must be added to the building's x/y.
+    """
+    boxes = [box for box in (img.getbbox() for img in images) if box]
+    boxes += [(box[0] // 2, box[1] // 2, (box[2] + 1) // 2, (box[3] + 1) // 2)
+              for box in (img.getbbox() for img in images_2x) if box]
+    if not boxes:
+        return images, images_2x, (0, 0)
+
+    box = (min(b[0] for b in boxes), min(b[1] for b in boxes),
+           max(b[2] for b in boxes), max(b[3] for b in boxes))
+    box_2x = tuple(v * 2 for v in box)
+    return (tuple(img.crop(box) for img in images),
+            tuple(img.crop(box_2x) for img in images_2x), box[:2])
+
+
+def compute_adjusted_position(building_key, trim_offset=(0, 0)):
     """Compute adjusted x,y position when building grows from 100x80.
 
     Center anchor: the building grows equally in all directions from
-    the center of the original 100x80 placeholder.
+    the center of the original 100x80 placeholder. trim_offset is the
+    top-left of the trimmed sprite within the full BUILDING_SIZES canvas.
     Returns (new_x, new_y, dx, dy).
     """
     orig_x, orig_y = BUILDING_POSITIONS[building_key]
     new_w, new_h = BUILDING_SIZES[building_key]
 
-    dx = -(new_w - ORIG_W) // 2
-    dy = -(new_h - ORIG_H) // 2
+    dx = -(new_w - ORIG_W) // 2 + trim_offset[0]
+    dy = -(new_h - ORIG_H) // 2 + trim_offset[1]
 
     new_x = orig_x + dx
     new_y = orig_y + dy
@@ -583,25 +798,211 @@ def compute_adjusted_position(building_key):
     return new_x, new_y, dx, dy
 
 
-def create_preview(building_key, building_img):
-    """Composite building over town background at its position."""
+@functools.lru_cache(maxsize=1)
+def load_town_background():
+    """Decode the town background once per process; None if it is missing."""
     if not os.path.exists(TOWN_BG_PATH):
-        print(f"  Warning: Town background not found at {TOWN_BG_PATH}, skipping preview")
         return None
+    with Image.open(TOWN_BG_PATH) as bg:
+        return bg.convert("RGBA")
 
-    bg = Image.open(TOWN_BG_PATH).convert("RGBA")
-    new_x, new_y, _, _ = compute_adjusted_position(building_key)
+
+def _preview_position(building_key, trim_offset=(0, 0)):
+    new_x, new_y, _, _ = compute_adjusted_position(building_key, trim_offset)
 
     # Clamp to valid range
-    new_x = max(0, new_x)
-    new_y = max(0, new_y)
+    return max(0, new_x), max(0, new_y)
+
+
+def create_preview(building_key, building_img, trim_offset=(0, 0)):
+    """Composite building over town background at its position."""
+    bg = load_town_background()
+    if bg is None:
+        print(f"  Warning: Town background not found at {TOWN_BG_PATH}, skipping preview")
+        return None
 
-    bg.paste(building_img, (new_x, new_y), building_img)
+    bg = bg.copy()
+    bg.paste(building_img, _preview_position(building_key, trim_offset), building_img)
     return bg
 
 
-def process_building(building_key, input_path, update_config=False):
-    """Process a single building image through the full pipeline."""
+def top_build_tiers(building_keys):
+    """Drop buildings replaced by a higher tier in the same set (e.g. fort by castle)."""
+    keys = set(building_keys)
+    for tiers in BUILD_TIERS:
+        present = [key for key in tiers if key in keys]
+        keys.difference_update(present[:-1])
+    return [key for key in building_keys if key in keys]
+
+
+def _structure_z_order():
+    """Map building key -> z from jurassica.json (empty if it can't be read)."""
+    try:
+        with open(CONFIG_PATH, 'r') as f:
+            structures = json.load(f)["jurassica"]["town"]["structures"]
+    except (OSError, ValueError, KeyError):
+        return {}
+    return {key: s.get("z", 0) for key, s in structures.items()}
+
+
+def create_town_preview(building_keys, trim_offsets=None):
+    """Composite the highest built tier of every building into one town image.
+
+    Sprites are read from BUILDINGS_DIR and pasted in config z order onto a
+    single copy of the decoded town background. trim_offsets maps building
+    key -> trim offset for sprites written with --trim.
+    """
+    trim_offsets = trim_offsets or {}
+    bg = load_town_background()
+    if bg is None:
+        print(f"  Warning: Town background not found at {TOWN_BG_PATH}, skipping town preview")
+        return None
+
+    z_order = _structure_z_order()
+    shown = sorted(top_build_tiers(building_keys), key=lambda k: z_order.get(k, 0))
+
+    town = bg.copy()
+    for building_key in shown:
+        with Image.open(building_output_paths(building_key)[0]) as sprite:
+            sprite = sprite.convert("RGBA")
+        position = _preview_position(building_key, trim_offsets.get(building_key, (0, 0)))
+        town.paste(sprite, position, sprite)
+    return town, shown
+
+
+def building_output_paths(building_key):
+    """Paths written by process_building: sprite, area, border and icon at 1x,
+    the same four at 2x, then the preview."""
+    return [os.path.join(directory, f"{building_key}{suffix}.png")
+            for directory in (BUILDINGS_DIR, BUILDINGS_2X_DIR)
+            for suffix in ("", "_area", "_border", "_icon")] + [
+        os.path.join(PREVIEWS_DIR, f"{building_key}_preview.png")]
+
+
+def _reset_peak_rss():
+    """Reset the kernel's peak-RSS counter for this process (Linux only).
+
+    Returns False where that is not supported.
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def _memory_kb():
+    """(current, peak) resident set size of this process in KB.
+
+    Read from /proc/self/status on Linux. Elsewhere the current size is
+    unknown (0) and the peak is getrusage's lifetime high-water mark.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if ":" in line)
+        return int(fields["VmRSS"].split()[0]), int(fields["VmHWM"].split()[0])
+    except (OSError, KeyError, ValueError):
+        pass
+    if resource is None:
+        return 0, 0
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return 0, peak // 1024 if sys.platform == "darwin" else peak
+
+
+class PipelineProfiler:
+    """Records wall time, peak memory and pixel counts per stage per building.
+
+    Peak memory is process RSS, so it includes Pillow's and numpy's buffers:
+    the high-water mark during the stage above the RSS when it started. On
+    Linux the kernel's peak counter is reset per stage; elsewhere only stages
+    that raise the process's lifetime peak report growth. With memory=False
+    only times and pixel counts are recorded (peak_kb is 0).
+    """
+
+    FIELDS = ["building", "stage", "seconds", "peak_kb", "pixels_in", "pixels_out"]
+
+    def __init__(self, memory=True):
+        self.records = []
+        self.memory = memory
+
+    @contextlib.contextmanager
+    def stage(self, building_key, stage):
+        record = {"building": building_key, "stage": stage, "pixels_in": 0, "pixels_out": 0,
+                  "peak_kb": 0}
+        if self.memory:
+            reset = _reset_peak_rss()
+            current, peak = _memory_kb()
+            base = current if reset else peak
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - start
+            if self.memory:
+                record["peak_kb"] = max(0, _memory_kb()[1] - base)
+            self.records.append(record)
+
+    def write_report(self, path):
+        """Write records as CSV (for a .csv path) or JSON (anything else)."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if path.lower().endswith(".csv"):
+            with open(path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=self.FIELDS)
+                writer.writeheader()
+                for record in self.records:
+                    writer.writerow({k: record[k] for k in self.FIELDS})
+        else:
+            with open(path, 'w') as f:
+                json.dump({"records": self.records}, f, indent=2)
+
+    def print_summary(self):
+        """Print per-stage and per-building totals, most expensive first."""
+        if not self.records:
+            print("\nProfile: no buildings were processed")
+            return
+
+        for column, title in [("stage", "Stage"), ("building", "Building")]:
+            totals = {}
+            for record in self.records:
+                row = totals.setdefault(record[column], {"seconds": 0.0, "peak_kb": 0,
+                                                          "pixels_in": 0, "pixels_out": 0})
+                row["seconds"] += record["seconds"]
+                row["peak_kb"] = max(row["peak_kb"], record["peak_kb"])
+                row["pixels_in"] += record["pixels_in"]
+                row["pixels_out"] += record["pixels_out"]
+
+            print(f"\n  {title:<18} {'total s':>9} {'peak MB':>9} {'Mpx in':>9} {'Mpx out':>9}")
+            for name, row in sorted(totals.items(), key=lambda item: -item[1]["seconds"]):
+                print(f"  {name:<18} {row['seconds']:9.3f} {row['peak_kb'] / 1024:9.1f} "
+                      f"{row['pixels_in'] / 1e6:9.2f} {row['pixels_out'] / 1e6:9.2f}")
+
+
+def _stage(profiler, building_key, stage):
+    """profiler.stage() if profiling, else a no-op context yielding a scratch record."""
+    if profiler is None:
+        return contextlib.nullcontext({})
+    return profiler.stage(building_key, stage)
+
+
+def _pixels(*images):
+    return sum(img.width * img.height for img in images)
+
+
+def process_building(building_key, input_path, update_config=False, dry_run=False,
+                     profiler=None, options=BuildOptions(), preview=True):
+    """Process a single building image through the full pipeline.
+
+    options is a BuildOptions with the settings that change the images. If a
+    PipelineProfiler is given, every stage is recorded on it. With preview
+    False, the per-building preview is not composited (batches that write
+    one town preview instead).
+
+    Returns False on failure, otherwise a dict describing the build:
+    "trim_offset" (top-left of the trimmed sprite in the full 1x canvas,
+    (0, 0) without trimming) and "texture_saved" (RGBA bytes saved by
+    trimming, both scales).
+    """
     if building_key not in BUILDING_SIZES:
         print(f"Error: Unknown building key '{building_key}'")
         print(f"Valid keys: {', '.join(sorted(BUILDING_SIZES.keys()))}")
@@ -611,97 +1012,158 @@ def process_building(building_key, input_path, update_config=False):
 
     print(f"\nProcessing: {building_key} ({BUILDING_NAMES.get(building_key, '?')})")
     print(f"  Input:  {input_path}")
-    print(f"  Target: {target_w}x{target_h}")
+    print(f"  Target: {target_w}x{target_h} (2x: {target_w * SCALE_2X}x{target_h * SCALE_2X})")
 
     # Load and process
-    try:
-        raw = Image.open(input_path)
-    except Exception as e:
-        print(f"  Error loading image: {e}")
-        return False
-
-    print(f"  Raw size: {raw.size[0]}x{raw.size[1]}, mode: {raw.mode}")
+    with _stage(profiler, building_key, "decode") as record:
+        try:
+            raw, raw_size, raw_mode = load_raw_image(input_path, target_w, target_h)
+        except Exception as e:
+            print(f"  Error loading image: {e}")
+            return False
+        record["pixels_in"] = raw_size[0] * raw_size[1]
+        record["pixels_out"] = _pixels(raw)
+
+    print(f"  Raw size: {raw_size[0]}x{raw_size[1]}, mode: {raw_mode}")
+    if raw.size != raw_size:
+        print(f"  Decoded at: {raw.size[0]}x{raw.size[1]}")
 
     # Step 1: Remove background
-    img = remove_background(raw)
+    with _stage(profiler, building_key, "remove_background") as record:
+        img = remove_background(raw, options.bg_mode, options.bg_falloff)
+        record["pixels_in"] = record["pixels_out"] = _pixels(img)
     print("  Background removal: done")
 
-    # Step 2: Resize to target dimensions
-    img = resize_building(img, target_w, target_h)
-    print(f"  Resized to: {target_w}x{target_h}")
-
-    # Step 3: Generate area mask
-    area = generate_area_mask(img)
-
-    # Step 4: Generate border mask
-    border = generate_border_mask(img)
+    # Step 2: Resize to the 2x target, then derive the 1x sprite from it
+    with _stage(profiler, building_key, "resize") as record:
+        record["pixels_in"] = _pixels(img)
+        img_2x = resize_building(img, target_w * SCALE_2X, target_h * SCALE_2X)
+        record["pixels_out"] = _pixels(img_2x)
+    with _stage(profiler, building_key, "downscale") as record:
+        img = img_2x.resize((target_w, target_h), Image.LANCZOS)
+        record["pixels_in"] = _pixels(img_2x)
+        record["pixels_out"] = _pixels(img)
+    print(f"  Resized to: {target_w * SCALE_2X}x{target_h * SCALE_2X}, {target_w}x{target_h}")
+
+    # Step 3-4: Generate area and border masks
+    with _stage(profiler, building_key, "masks") as record:
+        area_2x, border_2x = generate_masks(img_2x, scale=SCALE_2X)
+        area, border = generate_masks(img)
+        record["pixels_in"] = _pixels(img_2x, img)
+        record["pixels_out"] = _pixels(area_2x, border_2x, area, border)
 
     # Step 5: Generate icon
-    icon = generate_icon(img)
+    with _stage(profiler, building_key, "icon") as record:
+        icon_2x = generate_icon(img_2x, size=44 * SCALE_2X)
+        icon = generate_icon(img)
+        record["pixels_in"] = _pixels(img_2x, img)
+        record["pixels_out"] = _pixels(icon_2x, icon)
+
+    # Optional: trim sprite and masks to their visible bounding box
+    trim_offset = (0, 0)
+    texture_saved = 0
+    if options.trim:
+        with _stage(profiler, building_key, "trim") as record:
+            record["pixels_in"] = _pixels(img, area, border, img_2x, area_2x, border_2x)
+            (img, area, border), (img_2x, area_2x, border_2x), trim_offset = trim_building(
+                (img, area, border), (img_2x, area_2x, border_2x))
+            record["pixels_out"] = _pixels(img, area, border, img_2x, area_2x, border_2x)
+            texture_saved = (record["pixels_in"] - record["pixels_out"]) * 4
+        print(f"  Trimmed to: {img.width}x{img.height} at +{trim_offset[0]},+{trim_offset[1]} "
+              f"(saves {texture_saved / 1024:.0f} KB of RGBA texture)")
 
     # Step 6: Save all files
     os.makedirs(BUILDINGS_DIR, exist_ok=True)
+    os.makedirs(BUILDINGS_2X_DIR, exist_ok=True)
 
-    sprite_path = os.path.join(BUILDINGS_DIR, f"{building_key}.png")
-    area_path = os.path.join(BUILDINGS_DIR, f"{building_key}_area.png")
-    border_path = os.path.join(BUILDINGS_DIR, f"{building_key}_border.png")
-    icon_path = os.path.join(BUILDINGS_DIR, f"{building_key}_icon.png")
+    paths = building_output_paths(building_key)
+    outputs = [img, area, border, icon, img_2x, area_2x, border_2x, icon_2x]
 
-    img.save(sprite_path)
-    area.save(area_path)
-    border.save(border_path)
-    icon.save(icon_path)
+    with _stage(profiler, building_key, "encode") as record:
+        changed = sum(output_files.save_png(image, path) for image, path in zip(outputs, paths))
+        record["pixels_in"] = record["pixels_out"] = _pixels(*outputs)
 
     print(f"  Saved: {building_key}.png, {building_key}_area.png, "
-          f"{building_key}_border.png, {building_key}_icon.png")
+          f"{building_key}_border.png, {building_key}_icon.png "
+          f"(1x and 2x, {changed} of {len(outputs)} changed)")
 
     # Step 7: Create preview
-    os.makedirs(PREVIEWS_DIR, exist_ok=True)
-    preview = create_preview(building_key, img)
     if preview:
-        preview_path = os.path.join(PREVIEWS_DIR, f"{building_key}_preview.png")
-        preview.save(preview_path)
-        print(f"  Preview: {preview_path}")
+        os.makedirs(PREVIEWS_DIR, exist_ok=True)
+        with _stage(profiler, building_key, "preview") as record:
+            preview_img = create_preview(building_key, img, trim_offset)
+            if preview_img:
+                preview_path = building_output_paths(building_key)[-1]
+                output_files.save_png(preview_img, preview_path)
+                record["pixels_in"] = _pixels(img)
+                record["pixels_out"] = _pixels(preview_img)
+        if preview_img:
+            print(f"  Preview: {preview_path}")
 
     # Step 8: Report position adjustments
-    new_x, new_y, dx, dy = compute_adjusted_position(building_key)
+    new_x, new_y, dx, dy = compute_adjusted_position(building_key, trim_offset)
     if dx != 0 or dy != 0:
         orig_x, orig_y = BUILDING_POSITIONS[building_key]
         print(f"  Position: ({orig_x},{orig_y}) -> ({new_x},{new_y})  "
               f"(dx={dx:+d}, dy={dy:+d})")
 
         if update_config:
-            update_building_config(building_key, new_x, new_y)
+            apply_config_updates({building_key: (new_x, new_y)}, dry_run)
     else:
         print(f"  Position: unchanged ({new_x},{new_y})")
 
-    return True
+    return {"trim_offset": trim_offset, "texture_saved": texture_saved}
 
 
-def update_building_config(building_key, new_x, new_y):
-    """Update the x,y position in jurassica.json for a building."""
+def apply_config_updates(updates, dry_run=False):
+    """Apply a change set {building_key: (x, y)} to jurassica.json in one write.
+
+    The config is parsed once, every position is updated in memory and the
+    file is replaced atomically. With dry_run, only the x/y diff is printed.
+    """
+    if not updates:
+        return
+
     try:
         with open(CONFIG_PATH, 'r') as f:
             config = json.load(f)
 
         structures = config["jurassica"]["town"]["structures"]
-        if building_key in structures:
+        changed = 0
+        for building_key, (new_x, new_y) in updates.items():
+            if building_key not in structures:
+                print(f"  Warning: {building_key} not found in config structures")
+                continue
+
             old_x = structures[building_key]["x"]
             old_y = structures[building_key]["y"]
+            if (old_x, old_y) == (new_x, new_y):
+                continue
+
+            verb = "would update" if dry_run else "updated"
+            print(f"  Config {verb}: {building_key} ({old_x},{old_y}) -> ({new_x},{new_y})  "
+                  f"(x {new_x - old_x:+d}, y {new_y - old_y:+d})")
             structures[building_key]["x"] = new_x
             structures[building_key]["y"] = new_y
+            changed += 1
 
-            with open(CONFIG_PATH, 'w') as f:
-                json.dump(config, f, indent=2)
-
-            print(f"  Config updated: {building_key} ({old_x},{old_y}) -> ({new_x},{new_y})")
+        if not changed:
+            print("  Config: positions already up to date")
+        elif dry_run:
+            print(f"  Config: dry run, {changed} position(s) not written")
         else:
-            print(f"  Warning: {building_key} not found in config structures")
+            output_files.write_json(CONFIG_PATH, config, indent=2)
+            print(f"  Config: wrote {changed} position change(s) to {CONFIG_PATH}")
 
     except Exception as e:
         print(f"  Error updating config: {e}")
 
 
+def update_building_config(building_key, new_x, new_y):
+    """Update the x,y position in jurassica.json for a building."""
+    apply_config_updates({building_key: (new_x, new_y)})
+
+
 def show_prompt(building_key):
     """Print the AI generation prompt for a building."""
     if building_key not in BUILDING_PROMPTS:
@@ -756,32 +1218,406 @@ def show_all_prompts():
             show_prompt(key)
 
 
-def batch_process(raw_dir, update_config=False):
-    """Process all <key>.png files found in raw_dir."""
+def load_build_cache():
+    """Load the build manifest, or an empty one if missing/stale/corrupt."""
+    try:
+        with open(CACHE_PATH, 'r') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {"version": CACHE_VERSION, "buildings": {}}
+    if cache.get("version") != CACHE_VERSION:
+        return {"version": CACHE_VERSION, "buildings": {}}
+    return cache
+
+
+def save_build_cache(cache):
+    """Write the build manifest atomically (skipped if unchanged)."""
+    output_files.write_json(CACHE_PATH, cache, count=False, indent=2, sort_keys=True)
+
+
+def _town_background_digest():
+    return output_files.file_digest(TOWN_BG_PATH) if os.path.exists(TOWN_BG_PATH) else None
+
+
+def _build_params_digest(building_key, town_bg_digest, options):
+    """Digest of every setting that affects a building's outputs."""
+    params = {
+        "options": options._asdict(),
+        "size": BUILDING_SIZES[building_key],
+        "decode_scale": [RAW_DECODE_SCALE, SCALE_2X],
+        "position": compute_adjusted_position(building_key)[:2],
+        "chroma_keys": CHROMA_KEYS,
+        "border_color": BORDER_COLOR,
+        "mask": [MASK_ALPHA_THRESHOLD, AREA_CLOSE_SIZE, AREA_ERODE_SIZE, AREA_PAD_SIZE,
+                 BORDER_OUTER_SIZE, BORDER_INNER_SIZE],
+        "town_background": town_bg_digest,
+    }
+    return hashlib.sha256(json.dumps(params, sort_keys=True).encode()).hexdigest()
+
+
+def _build_fingerprint(cache, building_key, input_path, town_bg_digest, options):
+    """Return the cache fingerprint for one raw input.
+
+    The raw file is only re-hashed when its size or mtime changed since the
+    last recorded build, so a no-op batch does no full reads.
+    """
+    entry = cache["buildings"].get(building_key, {})
+    input_stat = output_files.file_stat(input_path)
+    if entry.get("input_stat") == input_stat:
+        input_hash = entry["input_hash"]
+    else:
+        input_hash = output_files.file_digest(input_path)
+    return {
+        "input_stat": input_stat,
+        "input_hash": input_hash,
+        "params": _build_params_digest(building_key, town_bg_digest, options),
+    }
+
+
+def _refresh_input_stat(cache, building_key, fingerprint):
+    """Record a cached raw's new size/mtime after it was touched but not modified.
+
+    Returns True if the manifest entry changed, so the next run can skip
+    re-hashing the file.
+    """
+    entry = cache["buildings"].get(building_key)
+    if not entry or entry.get("input_stat") == fingerprint["input_stat"]:
+        return False
+    entry["input_stat"] = fingerprint["input_stat"]
+    return True
+
+
+def _is_cached(cache, building_key, fingerprint, preview=True):
+    """True if the recorded build matches the fingerprint and its outputs are intact.
+
+    With preview, a build that left out the per-building preview (one made
+    for a town preview) is not cached, as long as there is a town background
+    to composite it on.
+    """
+    entry = cache["buildings"].get(building_key)
+    if not entry:
+        return False
+    if (entry["input_hash"] != fingerprint["input_hash"]
+            or entry["params"] != fingerprint["params"]):
+        return False
+    if (preview and os.path.exists(TOWN_BG_PATH)
+            and not os.path.exists(building_output_paths(building_key)[-1])):
+        return False
+    for rel_path, stat in entry["outputs"].items():
+        path = os.path.join(BASE, rel_path)
+        if not os.path.exists(path) or output_files.file_stat(path) != stat:
+            return False
+    return True
+
+
+def _record_build(cache, building_key, fingerprint, build):
+    """Store a finished build (process_building's result dict) in the manifest."""
+    outputs = {}
+    for path in building_output_paths(building_key):
+        if os.path.exists(path):
+            outputs[os.path.relpath(path, BASE)] = output_files.file_stat(path)
+    cache["buildings"][building_key] = dict(
+        fingerprint, outputs=outputs, trim_offset=list(build["trim_offset"]),
+        texture_saved=build["texture_saved"])
+
+
+def _cached_trim_offsets(cache, building_keys):
+    """Map building key -> trim offset recorded in the manifest."""
+    buildings = cache["buildings"]
+    return {key: tuple(buildings[key].get("trim_offset", (0, 0)))
+            for key in building_keys if key in buildings}
+
+
+def write_town_preview(building_keys, trim_offsets=None):
+    """Save create_town_preview() output as previews/town_preview.png."""
+    result = create_town_preview(building_keys, trim_offsets)
+    if result:
+        town, shown = result
+        os.makedirs(PREVIEWS_DIR, exist_ok=True)
+        town_path = os.path.join(PREVIEWS_DIR, "town_preview.png")
+        output_files.save_png(town, town_path)
+        print(f"  Town preview: {town_path} ({len(shown)} buildings)")
+
+
+def _collect_position_update(updates, building_key, trim_offset=(0, 0)):
+    """Add a building's adjusted position to a config change set, if it moved."""
+    new_x, new_y, dx, dy = compute_adjusted_position(building_key, trim_offset)
+    if dx != 0 or dy != 0:
+        updates[building_key] = (new_x, new_y)
+
+
+def _process_building_job(job):
+    """Worker entry point for parallel batches.
+
+    Runs process_building without touching the config and returns
+    (build result, captured log, profile records, output stats) so the
+    parent can print logs in order and merge profiles and file counts.
+    """
+    building_key, input_path, profile, options, preview = job
+    profiler = PipelineProfiler() if profile else None
+    output_files.reset_stats()
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        build = process_building(building_key, input_path, profiler=profiler,
+                                 options=options, preview=preview)
+    return (build, log.getvalue(), profiler.records if profiler else [],
+            output_files.reset_stats())
+
+
+def _raw_inputs(filenames):
+    """Pick one raw image per building key.
+
+    Returns (key -> filename, duplicate filenames). Names are taken in
+    sorted order, so of castle.jpg and castle.png the first wins, in batch
+    and watch mode alike.
+    """
+    chosen = {}
+    duplicates = []
+    for filename in sorted(filenames):
+        if not filename.lower().endswith(RAW_EXTENSIONS):
+            continue
+        key = os.path.splitext(filename)[0]
+        if key in chosen:
+            duplicates.append(filename)
+        else:
+            chosen[key] = filename
+    return chosen, duplicates
+
+
+def batch_process(raw_dir, update_config=False, jobs=1, force=False, dry_run=False,
+                  town_preview=False, profiler=None, options=BuildOptions()):
+    """Process all <key>.png (or .jpg/.jpeg/.webp) files found in raw_dir.
+
+    Buildings whose raw input and output-affecting settings are unchanged
+    since the last run are reported as cached and not rebuilt, unless
+    force is set.
+
+    With jobs > 1, buildings are fanned out over a process pool. Logs are
+    printed per building in filename order.
+
+    With update_config, position changes are collected into one change set
+    and written to jurassica.json once at the end (or only printed, with
+    dry_run), so workers never touch the config.
+
+    With town_preview, every built building (processed or cached) is
+    composited into a single previews/town_preview.png instead of one
+    preview per building.
+
+    With a PipelineProfiler, stage records from every processed building
+    (including those from workers) are collected on it.
+    """
     if not os.path.isdir(raw_dir):
         print(f"Error: Directory not found: {raw_dir}")
         return
 
     processed = 0
+    cached = 0
     skipped = 0
+    texture_saved = 0
+    cache_changed = False
+    config_updates = {}
+    built_keys = []
 
-    for filename in sorted(os.listdir(raw_dir)):
-        if not filename.lower().endswith(".png"):
-            continue
-
+    chosen, duplicates = _raw_inputs(os.listdir(raw_dir))
+    for filename in duplicates:
         key = os.path.splitext(filename)[0]
+        print(f"  Skipping {filename} (another raw image for '{key}' was already found)")
+        skipped += 1
+    entries = [(filename, key, os.path.join(raw_dir, filename))
+               for key, filename in sorted(chosen.items(), key=lambda item: item[1])]
+
+    output_files.reset_stats()
+    cache = load_build_cache()
+    town_bg_digest = _town_background_digest()
+    fingerprints = {}
+    stale = []
+    for _, key, path in entries:
         if key not in BUILDING_SIZES:
-            print(f"  Skipping {filename} ('{key}' is not a valid building key)")
-            skipped += 1
             continue
+        fingerprints[key] = _build_fingerprint(cache, key, path, town_bg_digest, options)
+        if force or not _is_cached(cache, key, fingerprints[key], not town_preview):
+            stale.append((key, path))
+    stale_keys = {key for key, _ in stale}
+    parallel = jobs > 1 and len(stale) > 1
+
+    with contextlib.ExitStack() as stack:
+        if parallel:
+            executor = stack.enter_context(
+                ProcessPoolExecutor(max_workers=min(jobs, len(stale))))
+            results = executor.map(_process_building_job,
+                                   [(key, path, profiler is not None, options,
+                                     not town_preview)
+                                    for key, path in stale])
+
+        for filename, key, input_path in entries:
+            if key not in BUILDING_SIZES:
+                print(f"  Skipping {filename} ('{key}' is not a valid building key)")
+                skipped += 1
+                continue
+
+            if key not in stale_keys:
+                print(f"  Cached: {key} (input and settings unchanged)")
+                cached += 1
+                cache_changed |= _refresh_input_stat(cache, key, fingerprints[key])
+                built_keys.append(key)
+                entry = cache["buildings"][key]
+                texture_saved += entry.get("texture_saved", 0)
+                # Outputs are current, but the config may still need the position
+                if update_config:
+                    _collect_position_update(config_updates, key,
+                                             entry.get("trim_offset", (0, 0)))
+                continue
+
+            if parallel:
+                build, log, records, file_stats = next(results)
+                sys.stdout.write(log)
+                output_files.stats.add(file_stats)
+                if profiler:
+                    profiler.records.extend(records)
+            else:
+                build = process_building(key, input_path, profiler=profiler,
+                                         options=options, preview=not town_preview)
+
+            if build:
+                _record_build(cache, key, fingerprints[key], build)
+                cache_changed = True
+                built_keys.append(key)
+                texture_saved += build["texture_saved"]
+                if update_config:
+                    _collect_position_update(config_updates, key, build["trim_offset"])
+                processed += 1
+            else:
+                skipped += 1
+
+    if cache_changed:
+        save_build_cache(cache)
+
+    if update_config:
+        print()
+        apply_config_updates(config_updates, dry_run)
 
-        input_path = os.path.join(raw_dir, filename)
-        if process_building(key, input_path, update_config):
-            processed += 1
-        else:
-            skipped += 1
+    if town_preview and built_keys:
+        print()
+        write_town_preview(built_keys, _cached_trim_offsets(cache, built_keys))
+
+    if options.trim:
+        print(f"\nTrimming saved {texture_saved / (1024 * 1024):.2f} MB of RGBA texture "
+              f"across {len(built_keys)} buildings (sprite + area + border)")
 
-    print(f"\nBatch complete: {processed} processed, {skipped} skipped")
+    print(f"\nBatch complete: {processed} processed, {cached} cached, {skipped} skipped")
+    print(f"Files: {output_files.stats.summary()}")
+
+
+def _scan_raw_dir(raw_dir):
+    """Map raw image filename -> [size, mtime_ns] for every raw input in raw_dir."""
+    snapshot = {}
+    with os.scandir(raw_dir) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.lower().endswith(RAW_EXTENSIONS):
+                st = entry.stat()
+                snapshot[entry.name] = [st.st_size, st.st_mtime_ns]
+    return snapshot
+
+
+def _rebuild_watched(raw_dir, filename, update_config, dry_run, town_preview, options):
+    """Reprocess one changed raw file in watch mode, unless its content is cached."""
+    key = os.path.splitext(filename)[0]
+    if key not in BUILDING_SIZES:
+        print(f"  Skipping {filename} ('{key}' is not a valid building key)")
+        return
+    chosen, _ = _raw_inputs(_scan_raw_dir(raw_dir))
+    if chosen.get(key, filename) != filename:
+        print(f"  Skipping {filename} (another raw image for '{key}' was already found)")
+        return
+
+    start = time.perf_counter()
+    input_path = os.path.join(raw_dir, filename)
+    cache = load_build_cache()
+    fingerprint = _build_fingerprint(cache, key, input_path, _town_background_digest(),
+                                     options)
+    if _is_cached(cache, key, fingerprint, not town_preview):
+        print(f"  Cached: {key} (content unchanged)")
+        if _refresh_input_stat(cache, key, fingerprint):
+            save_build_cache(cache)
+        return
+
+    build = process_building(key, input_path, update_config, dry_run, options=options,
+                             preview=not town_preview)
+    if not build:
+        return
+    _record_build(cache, key, fingerprint, build)
+    save_build_cache(cache)
+
+    if town_preview:
+        # Only buildings that have been built; a raw may have failed or be pending
+        keys = sorted(k for k in chosen if k in cache["buildings"]
+                      and os.path.exists(building_output_paths(k)[0]))
+        write_town_preview(keys, _cached_trim_offsets(cache, keys))
+    print(f"  Rebuilt {key} in {time.perf_counter() - start:.2f}s")
+
+
+def watch_raw_dir(raw_dir, update_config=False, dry_run=False, town_preview=False,
+                  options=BuildOptions()):
+    """Keep running and reprocess each raw image as soon as it is saved.
+
+    Starts with a cached batch run, then polls raw_dir. A new or modified
+    file is processed once its size and mtime have been stable for
+    WATCH_SETTLE_TIME, so partially written files are not picked up. A
+    rebuild that fails is reported and watching continues. Pillow, numpy and
+    the decoded town background stay loaded between rebuilds.
+    """
+    if not os.path.isdir(raw_dir):
+        print(f"Error: Directory not found: {raw_dir}")
+        return
+
+    # Snapshot before the batch, so a raw saved while it runs is rebuilt after
+    known = _scan_raw_dir(raw_dir)
+    batch_process(raw_dir, update_config, dry_run=dry_run, town_preview=town_preview,
+                  options=options)
+    print(f"\nWatching {raw_dir} for new or modified images (Ctrl+C to stop)...")
+
+    pending = {}  # filename -> (last seen stat, monotonic time it was first seen)
+    try:
+        while True:
+            time.sleep(WATCH_POLL_INTERVAL)
+            current = _scan_raw_dir(raw_dir)
+            now = time.monotonic()
+
+            for filename in list(pending):
+                if filename not in current:
+                    del pending[filename]
+            for filename in list(known):
+                if filename not in current:
+                    del known[filename]
+
+            for filename, stat in sorted(current.items()):
+                if known.get(filename) == stat:
+                    continue
+                seen = pending.get(filename)
+                if seen is None or seen[0] != stat:
+                    pending[filename] = (stat, now)
+                    continue
+                if now - seen[1] < WATCH_SETTLE_TIME:
+                    continue
+
+                del pending[filename]
+                known[filename] = stat
+                try:
+                    _rebuild_watched(raw_dir, filename, update_config, dry_run, town_preview,
+                                     options)
+                except Exception as e:
+                    # One bad file must not end the watch
+                    print(f"  Error rebuilding {filename}: {e}")
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+
+
+def _finish_profile(profiler, report_path):
+    if profiler is None:
+        return
+    profiler.print_summary()
+    profiler.write_report(report_path)
+    print(f"\nProfile report: {report_path}")
 
 
 def main():
@@ -791,22 +1627,56 @@ def main():
         epilog="""
 Examples:
   %(prog)s dwelling7 raw/dwelling7.png          Process single building
-  %(prog)s --batch raw/                          Process all <key>.png in raw/
+  %(prog)s --batch raw/                          Process all <key>.png/.jpg/.webp in raw/
+  %(prog)s --batch raw/ --jobs 16                Batch process on 16 worker processes
+  %(prog)s --batch raw/ --force                  Rebuild everything, ignoring the cache
+  %(prog)s --batch raw/ --town-preview           Also write one whole-town preview
+  %(prog)s --batch raw/ --profile report.csv     Time every stage, write a CSV report
+  %(prog)s --watch raw/ --town-preview           Rebuild each building as it is saved
+  %(prog)s --batch raw/ --bg-mode flood          Only remove background touching the edges
+  %(prog)s --batch raw/ --trim --update-config   Crop sprites/masks, shift config x/y to match
   %(prog)s --show-prompt dwelling7               Show AI prompt for one building
   %(prog)s --show-prompt --all                   Show all AI prompts by phase
   %(prog)s dwelling7 raw/dwelling7.png --update-config  Process and update config
+  %(prog)s --batch raw/ --update-config --dry-run       Show config x/y changes only
         """,
     )
 
     parser.add_argument("building_key", nargs="?", help="Building key (e.g. dwelling7)")
-    parser.add_argument("input_image", nargs="?", help="Path to raw input PNG")
-    parser.add_argument("--batch", metavar="DIR", help="Batch process all <key>.png in DIR")
+    parser.add_argument("input_image", nargs="?", help="Path to raw input image")
+    parser.add_argument("--batch", metavar="DIR", help="Batch process all <key>.png/.jpg/.webp in DIR")
+    parser.add_argument("--watch", metavar="DIR",
+                        help="Keep running and reprocess <key> images in DIR when they change")
     parser.add_argument("--show-prompt", action="store_true", help="Show AI generation prompt")
     parser.add_argument("--all", action="store_true", help="With --show-prompt, show all prompts")
     parser.add_argument("--update-config", action="store_true",
                         help="Update jurassica.json with adjusted positions")
+    parser.add_argument("--bg-mode", choices=BACKGROUND_MODES, default="global",
+                        help="Background removal: 'global' clears every key-colored pixel, "
+                             "'flood' only those connected to the image border")
+    parser.add_argument("--bg-falloff", type=int, default=0, metavar="PX",
+                        help="Feather alpha over PX pixels next to removed background")
+    parser.add_argument("--trim", action="store_true",
+                        help="Crop sprite and masks to their visible bounding box and "
+                             "offset the config position to keep placement")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="With --update-config, print x/y changes instead of writing")
+    parser.add_argument("--force", action="store_true",
+                        help="With --batch, rebuild every building even if cached")
+    parser.add_argument("--town-preview", action="store_true",
+                        help="With --batch/--watch, composite all built buildings into one "
+                             "preview instead of one per building")
+    parser.add_argument("--profile", nargs="?", metavar="REPORT",
+                        const=os.path.join(PREVIEWS_DIR, "profile.json"),
+                        help="Record per-stage time/memory and write a JSON (or .csv) report "
+                             "(default: previews/profile.json)")
+    parser.add_argument("--jobs", type=int, default=1, metavar="N",
+                        help="With --batch, process buildings on N worker processes "
+                             "(0 = one per CPU core)")
 
     args = parser.parse_args()
+    if args.jobs < 1:
+        args.jobs = os.cpu_count() or 1
 
     # --show-prompt mode
     if args.show_prompt:
@@ -818,14 +1688,29 @@ Examples:
             parser.error("--show-prompt requires a building_key or --all")
         return
 
+    options = BuildOptions(args.bg_mode, max(0, args.bg_falloff), args.trim)
+
+    # --watch mode
+    if args.watch:
+        watch_raw_dir(args.watch, args.update_config, args.dry_run, args.town_preview, options)
+        return
+
+    profiler = PipelineProfiler() if args.profile else None
+
     # --batch mode
     if args.batch:
-        batch_process(args.batch, args.update_config)
+        batch_process(args.batch, args.update_config, args.jobs, args.force, args.dry_run,
+                      args.town_preview, profiler, options)
+        _finish_profile(profiler, args.profile)
         return
 
     # Single building mode
     if args.building_key and args.input_image:
-        success = process_building(args.building_key, args.input_image, args.update_config)
+        success = process_building(args.building_key, args.input_image, args.update_config,
+                                   args.dry_run, profiler, options)
+        if success:
+            print(f"  Files: {output_files.stats.summary()}")
+        _finish_profile(profiler, args.profile)
         sys.exit(0 if success else 1)
 
     parser.print_help()
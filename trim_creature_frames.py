@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Trim the transparent margins off Jurassica creature battle frames.
+
+Placeholder and generated frames are full-canvas RGBA with wide transparent
+borders. For each animation label (move, idle, atkFwd, ...) every frame is
+cropped to one shared bounding box of visible pixels, so the animation does
+not jitter, and the crop's top-left is recorded in <name>Trim.json next to
+the cropped frames. The creature's battle animation JSON is written there
+too, with that offset (and the full canvas size) on each sequence so the
+trimmed frames stay anchored. Boxes are per label rather than per group
+number because several groups reuse one label's files (death, turn
+left/right).
+
+The game does not read the offsets yet, so the frames in Mods/ are left
+untouched: cropped frames go to trimmed/ (mirroring the Content paths).
+Trimming always starts from the full-canvas frames, so re-running after
+regenerating placeholders is safe. Labels that cannot be trimmed (mixed
+frame sizes, unreadable frames) are reported and copied unchanged, so the
+descriptor keeps every group.
+
+Usage:
+  python trim_creature_frames.py
+  python trim_creature_frames.py --creature trex,giganotosaurus
+  python trim_creature_frames.py --dry-run
+  python trim_creature_frames.py --strict
+
+Requirements: pip install Pillow
+"""
+
+import argparse
+import io
+import os
+import sys
+import time
+
+from PIL import Image
+
+import output_files
+from generate_animation_jsons import (
+    ANIM_GROUPS, BASE, CONTENT, CREATURES, RANGED, RANGED_GROUPS, SpriteIndex,
+    generate_battle_animation, trim_path, write_animation,
+)
+
+TRIM_DIR = os.path.join(BASE, "trimmed")
+
+
+def creature_labels(creature_name):
+    """Frame labels used by a creature's battle animation, in group order."""
+    groups = dict(ANIM_GROUPS)
+    if creature_name in RANGED:
+        groups.update(RANGED_GROUPS)
+    return list(dict.fromkeys(groups[group_id][0] for group_id in sorted(groups)))
+
+
+# Cropped frames are re-encoded at the strongest zlib level
+PNG_SAVE_OPTIONS = {"compress_level": 9}
+
+
+def _png_bytes(img):
+    buf = io.BytesIO()
+    img.save(buf, "PNG", **PNG_SAVE_OPTIONS)
+    return len(buf.getvalue())
+
+
+def trim_label(index, basepath, label):
+    """Crop one label's frames to their shared bounding box of visible pixels.
+
+    Returns (record, cropped) where cropped maps filename -> cropped image
+    (the frame itself if there is nothing to crop), or (None, {}) if the
+    frames cannot be trimmed.
+    """
+    names = index.frames(basepath, f"{label}_")
+    files = index.files(basepath)
+    sizes = {files[name] for name in names}
+    if not names:
+        return None, {}
+    if None in sizes:
+        index.problems.append(f"{basepath}{label}_NN.png: unreadable frame(s), not trimmed")
+        return None, {}
+    if len(sizes) != 1:
+        # Without a common canvas there is no box that keeps them aligned
+        index.problems.append(f"{basepath}{label}_NN.png: mixed frame sizes ("
+                              + ", ".join(f"{w}x{h}" for w, h in sorted(sizes))
+                              + "), not trimmed")
+        return None, {}
+    size = sizes.pop()
+
+    frames = {}
+    box = None
+    for name in names:
+        with Image.open(os.path.join(index.content_dir, basepath, name)) as frame:
+            frames[name] = frame.copy()
+        # Crop in the frame's own mode; only the alpha decides the box
+        bbox = frames[name].convert("RGBA").getchannel("A").getbbox()
+        if bbox:
+            box = bbox if box is None else (min(box[0], bbox[0]), min(box[1], bbox[1]),
+                                            max(box[2], bbox[2]), max(box[3], bbox[3]))
+
+    if box is None:
+        box = (0, 0) + size
+
+    record = {
+        "canvas": list(size),
+        "offset": [box[0], box[1]],
+        "size": [box[2] - box[0], box[3] - box[1]],
+    }
+    return record, {name: img.crop(box) for name, img in frames.items()}
+
+
+def trim_creature(index, creature_name, dry_run=False):
+    """Trim every battle label of one creature into TRIM_DIR, with its
+    <name>Trim.json and battle animation JSON.
+
+    Frames of a label that cannot be trimmed are copied unchanged, with no
+    trim record, so the descriptor still has every group.
+
+    Returns (pixels before, pixels after, PNG bytes before, PNG bytes after)
+    over the frames this run trimmed.
+    """
+    basepath = f"sprites/creatures/{creature_name}/"
+    out_dir = os.path.join(TRIM_DIR, basepath)
+    records = {}
+    copied = 0
+    pixels_before = pixels_after = bytes_before = bytes_after = 0
+    if not dry_run:
+        os.makedirs(out_dir, exist_ok=True)
+
+    for label in creature_labels(creature_name):
+        record, cropped = trim_label(index, basepath, label)
+        if record is None:
+            names = index.frames(basepath, f"{label}_")
+            if names:
+                print(f"    {label}: {len(names)} frame(s) copied untrimmed")
+            if not dry_run:
+                for name in names:
+                    with open(os.path.join(index.content_dir, basepath, name), 'rb') as f:
+                        output_files.write_bytes(os.path.join(out_dir, name), f.read())
+            copied += len(names)
+            continue
+        records[label] = record
+        for name, img in cropped.items():
+            w, h = index.files(basepath)[name]
+            pixels_before += w * h
+            pixels_after += img.width * img.height
+            bytes_before += os.path.getsize(os.path.join(index.content_dir, basepath, name))
+            if dry_run:
+                bytes_after += _png_bytes(img)
+            else:
+                path = os.path.join(out_dir, name)
+                output_files.save_png(img, path, **PNG_SAVE_OPTIONS)
+                bytes_after += os.path.getsize(path)
+        if record["size"] != record["canvas"]:
+            w, h = record["size"]
+            print(f"    {label}: {len(cropped)} frame(s) -> {w}x{h} "
+                  f"at +{record['offset'][0]},+{record['offset'][1]}")
+
+    if (records or copied) and not dry_run:
+        output_files.write_json(trim_path(TRIM_DIR, creature_name),
+                                {"labels": records}, indent='\t', sort_keys=True)
+        # Problems with the copied frames were already reported above
+        trimmed = SpriteIndex(TRIM_DIR)
+        write_animation(os.path.join(out_dir, f"{creature_name}.json"),
+                        generate_battle_animation(creature_name, trimmed), trimmed)
+    return pixels_before, pixels_after, bytes_before, bytes_after
+
+
+def trim_all(creatures=CREATURES, dry_run=False):
+    """Trim the given creatures; returns the problems found on disk."""
+    start = time.perf_counter()
+    index = SpriteIndex(CONTENT)
+    output_files.reset_stats()
+    totals = [0, 0, 0, 0]
+
+    print("Trimming creature battle frames..." + (" (dry run)" if dry_run else ""))
+    for name in creatures:
+        print(f"  {name}:")
+        saved = trim_creature(index, name, dry_run)
+        totals = [t + s for t, s in zip(totals, saved)]
+        pixels_before, pixels_after, bytes_before, bytes_after = saved
+        if not pixels_before:
+            print("    nothing to trim")
+            continue
+        print(f"    pixels {pixels_before:,} -> {pixels_after:,} "
+              f"(-{1 - pixels_after / pixels_before:.0%}, "
+              f"{(pixels_before - pixels_after) * 4 / 1024:.0f} KB less RGBA texture), "
+              f"PNG {bytes_before / 1024:.1f} KB -> {bytes_after / 1024:.1f} KB")
+
+    pixels_before, pixels_after, bytes_before, bytes_after = totals
+    print(f"\nTrimmed {len(creatures)} creature(s) in {time.perf_counter() - start:.2f}s: "
+          f"{(pixels_before - pixels_after) * 4 / 1024:.0f} KB of RGBA texture and "
+          f"{(bytes_before - bytes_after) / 1024:.1f} KB of PNG saved"
+          + ("" if dry_run else f" (files: {output_files.stats.summary()})"))
+    if index.problems:
+        print(f"\n{len(index.problems)} problem(s) found on disk:")
+        for problem in index.problems:
+            print(f"  {problem}")
+    return index.problems
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Trim transparent margins off Jurassica creature battle frames",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                              Trim every creature
+  %(prog)s --creature trex              Trim one creature
+  %(prog)s --dry-run                    Report savings without writing
+  %(prog)s --strict                     Exit 1 if any label could not be trimmed
+
+Frames in Mods/ are not modified; cropped frames, <name>Trim.json and the
+anchored battle JSON go to trimmed/.
+        """,
+    )
+    parser.add_argument("--creature", metavar="NAMES",
+                        help="Comma-separated creatures to trim (default: all)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="Report what would be saved without writing anything")
+    parser.add_argument("--strict", action="store_true",
+                        help="Exit 1 if any problems were found")
+
+    args = parser.parse_args()
+
+    creatures = CREATURES
+    if args.creature:
+        creatures = args.creature.split(",")
+        unknown = set(creatures) - set(CREATURES)
+        if unknown:
+            parser.error(f"unknown creature(s): {', '.join(sorted(unknown))}")
+
+    problems = trim_all(creatures, args.dry_run)
+    if args.strict and problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Validate the Jurassica town screen layout.
+
+Loads every building's _area.png click mask at its x/y from jurassica.json
+into a per-pixel bitset index over the 800x374 town screen, then:
+  - reports pixel-exact click-area overlaps between buildings that can be
+    built at the same time (tiers that replace each other are ignored)
+  - answers "which building is at (x,y)" queries
+  - optionally renders a hit map of the topmost building at every pixel
+
+Usage:
+  python validate_town_layout.py
+  python validate_town_layout.py --at 420,200 --at 10,300
+  python validate_town_layout.py --hit-map previews/hit_map.png
+
+Exits with status 1 if any overlaps are found.
+
+Requirements: pip install Pillow numpy
+"""
+
+import argparse
+import colorsys
+import json
+import os
+import sys
+
+import numpy as np
+from PIL import Image
+
+from process_building_art import BUILD_TIERS, CONFIG_PATH, CONTENT
+
+SCREEN_W, SCREEN_H = 800, 374
+
+
+def _replacement_pairs():
+    """Pairs of buildings that replace each other and never coexist on screen."""
+    pairs = set()
+    for tiers in BUILD_TIERS:
+        for i, a in enumerate(tiers):
+            for b in tiers[i + 1:]:
+                pairs.add(frozenset((a, b)))
+    return pairs
+
+
+def load_layout(config_path=CONFIG_PATH, content_dir=CONTENT):
+    """Read (key, x, y, z, mask) for every structure with an area mask.
+
+    mask is a boolean array, True where the area image is not transparent.
+    Structures whose area file is missing are reported and left out.
+    """
+    with open(config_path, 'r') as f:
+        structures = json.load(f)["jurassica"]["town"]["structures"]
+
+    layout = []
+    for key, structure in structures.items():
+        area_rel = structure.get("area")
+        if not area_rel or "x" not in structure or "y" not in structure:
+            continue
+        area_path = os.path.join(content_dir, area_rel)
+        if not os.path.exists(area_path):
+            print(f"  Warning: {key}: area mask not found at {area_path}")
+            continue
+        with Image.open(area_path) as area:
+            mask = np.array(area.convert("RGBA").getchannel("A")) > 0
+        layout.append((key, structure["x"], structure["y"], structure.get("z", 0), mask))
+    return layout
+
+
+class LayoutIndex:
+    """Bitset index of which click areas cover each pixel of the town screen.
+
+    Bit i of a pixel's word(s) is set when building i's area covers it.
+    Buildings are numbered in ascending z order, so hit_map (the topmost
+    building per pixel, as the game resolves clicks) is built in the same
+    pass.
+    """
+
+    def __init__(self, layout, size=(SCREEN_W, SCREEN_H)):
+        self.width, self.height = size
+        ordered = sorted(layout, key=lambda entry: entry[3])
+        self.keys = [entry[0] for entry in ordered]
+        self.words = max(1, (len(self.keys) + 63) // 64)
+        self.bits = np.zeros((self.height, self.width, self.words), dtype=np.uint64)
+        self.hit_map = np.full((self.height, self.width), -1, dtype=np.int16)
+
+        for i, (_, x, y, _, mask) in enumerate(ordered):
+            # Clip the mask to the screen
+            mh, mw = mask.shape
+            x0, y0 = max(0, x), max(0, y)
+            x1, y1 = min(self.width, x + mw), min(self.height, y + mh)
+            if x0 >= x1 or y0 >= y1:
+                continue
+            covered = mask[y0 - y:y1 - y, x0 - x:x1 - x]
+            word = self.bits[y0:y1, x0:x1, i // 64]
+            word[covered] |= np.uint64(1) << np.uint64(i % 64)
+            self.hit_map[y0:y1, x0:x1][covered] = i
+
+    def buildings_at(self, x, y):
+        """Keys of every building whose click area covers (x, y), topmost first."""
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return []
+        found = []
+        for word_idx, word in enumerate(self.bits[y, x]):
+            word = int(word)
+            while word:
+                low = word & -word
+                found.append(word_idx * 64 + low.bit_length() - 1)
+                word ^= low
+        return [self.keys[i] for i in sorted(found, reverse=True)]
+
+    def overlaps(self, ignore_pairs=frozenset()):
+        """Map (lower_z_key, upper_z_key) -> number of pixels both areas cover.
+
+        Only pixels covered by two or more areas are looked at, grouped by
+        their distinct bit patterns, so the cost does not grow with the
+        number of building pairs.
+        """
+        flat = self.bits.reshape(-1, self.words)
+        counts = np.zeros(len(flat), dtype=np.int32)
+        for word_idx in range(self.words):
+            word = flat[:, word_idx]
+            for bit in range(min(64, len(self.keys) - word_idx * 64)):
+                counts += ((word >> np.uint64(bit)) & np.uint64(1)).astype(np.int32)
+
+        shared = flat[counts >= 2]
+        if not len(shared):
+            return {}
+
+        pairs = {}
+        patterns, pixels = np.unique(shared, axis=0, return_counts=True)
+        for pattern, n_pixels in zip(patterns, pixels):
+            members = [w * 64 + b for w, word in enumerate(pattern)
+                       for b in range(64) if (int(word) >> b) & 1]
+            for i, a in enumerate(members):
+                for b in members[i + 1:]:
+                    key_a, key_b = self.keys[a], self.keys[b]
+                    if frozenset((key_a, key_b)) in ignore_pairs:
+                        continue
+                    pairs[(key_a, key_b)] = pairs.get((key_a, key_b), 0) + int(n_pixels)
+        return pairs
+
+    def render_hit_map(self):
+        """RGB image with one color per building (black where nothing is clickable)."""
+        palette = np.zeros((len(self.keys) + 1, 3), dtype=np.uint8)
+        for i in range(len(self.keys)):
+            r, g, b = colorsys.hsv_to_rgb((i * 0.618034) % 1.0, 0.65, 0.95)
+            palette[i + 1] = (int(r * 255), int(g * 255), int(b * 255))
+        return Image.fromarray(palette[self.hit_map + 1])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Validate Jurassica town screen click areas",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  %(prog)s                                 Report overlapping click areas
+  %(prog)s --at 420,200                    Which building is at (420,200)?
+  %(prog)s --hit-map hit_map.png           Render the topmost building per pixel
+        """,
+    )
+    parser.add_argument("--at", action="append", default=[], metavar="X,Y",
+                        help="Report the buildings at a screen point (repeatable)")
+    parser.add_argument("--hit-map", metavar="PNG", help="Write a color-coded hit map")
+    parser.add_argument("--config", default=CONFIG_PATH, help="Faction config to read")
+
+    args = parser.parse_args()
+
+    layout = load_layout(args.config)
+    index = LayoutIndex(layout)
+    print(f"Town layout: {len(index.keys)} click areas on {index.width}x{index.height}")
+
+    for point in args.at:
+        try:
+            x, y = (int(v) for v in point.split(","))
+        except ValueError:
+            parser.error(f"--at expects X,Y, got '{point}'")
+        found = index.buildings_at(x, y)
+        print(f"  ({x},{y}): {', '.join(found) if found else 'nothing'}")
+
+    if args.hit_map:
+        os.makedirs(os.path.dirname(os.path.abspath(args.hit_map)), exist_ok=True)
+        index.render_hit_map().save(args.hit_map)
+        print(f"  Hit map: {args.hit_map}")
+
+    overlaps = index.overlaps(_replacement_pairs())
+    if not overlaps:
+        print("\nNo overlapping click areas between buildings that can coexist.")
+        return
+
+    print("\nOverlapping click areas (buildings that can coexist):")
+    for (lower, upper), n_pixels in sorted(overlaps.items(), key=lambda item: -item[1]):
+        print(f"  {lower} <-> {upper}: {n_pixels} px ({upper} is on top)")
+    print(f"\n{len(overlaps)} overlapping pair(s)")
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()